@@ -274,6 +274,8 @@ rule determine_availability_matrix_MD_UA:
 
 # Optional input when having Ukraine (UA) or Moldova (MD) in the countries list
 def input_ua_md_availability_matrix(w):
+    if "clusters" not in w.keys():
+        return {}
     countries = set(config_provider("countries")(w))
     if {"UA", "MD"}.intersection(countries):
         return {
@@ -284,44 +286,56 @@ def input_ua_md_availability_matrix(w):
     return {}
 
 
+def input_availability_regions(w):
+    onshore = w.technology in ("onwind", "solar", "solar-hsat")
+    kind = "onshore" if onshore else "offshore"
+    clusters = "_{clusters}" if "clusters" in w.keys() else ""
+    return resources(f"regions_{kind}_base_s{clusters}.geojson")
+
+
+# Optional input to derive the clustered availability from the base regions
+def input_availability_matrix_base(w):
+    if "clusters" not in w.keys() or not config_provider(
+        "atlite", "availability_from_base_regions", default=False
+    )(w):
+        return {}
+    return {
+        "availability_matrix_base": resources(
+            "availability_matrix_base_s_{technology}.nc"
+        ),
+        "busmap": resources("busmap_base_s_{clusters}.csv"),
+    }
+
+
+# Exclusion layers, not needed if the availability is aggregated from the base regions
+def input_availability_exclusions(w):
+    if input_availability_matrix_base(w):
+        return {}
+    renewable = config_provider("renewable", w.technology)(w)
+    exclusions = {
+        "corine": ancient("data/bundle/corine/g250_clc06_V18_5.tif"),
+        "country_shapes": resources("country_shapes.geojson"),
+        "offshore_shapes": resources("offshore_shapes.geojson"),
+    }
+    if renewable.get("natura"):
+        exclusions["natura"] = "data/bundle/natura/natura.tiff"
+    if renewable.get("luisa"):
+        exclusions["luisa"] = "data/LUISA_basemap_020321_50m.tif"
+    if renewable.get("max_depth") or renewable.get("min_depth"):
+        exclusions["gebco"] = ancient("data/bundle/gebco/GEBCO_2014_2D.nc")
+    if "ship_threshold" in renewable.keys():
+        exclusions["ship_density"] = resources("shipdensity_raster.tif")
+    return exclusions
+
+
 rule determine_availability_matrix:
     params:
         renewable=config_provider("renewable"),
     input:
         unpack(input_ua_md_availability_matrix),
-        corine=ancient("data/bundle/corine/g250_clc06_V18_5.tif"),
-        natura=lambda w: (
-            "data/bundle/natura/natura.tiff"
-            if config_provider("renewable", w.technology, "natura")(w)
-            else []
-        ),
-        luisa=lambda w: (
-            "data/LUISA_basemap_020321_50m.tif"
-            if config_provider("renewable", w.technology, "luisa")(w)
-            else []
-        ),
-        gebco=ancient(
-            lambda w: (
-                "data/bundle/gebco/GEBCO_2014_2D.nc"
-                if (
-                    config_provider("renewable", w.technology)(w).get("max_depth")
-                    or config_provider("renewable", w.technology)(w).get("min_depth")
-                )
-                else []
-            )
-        ),
-        ship_density=lambda w: (
-            resources("shipdensity_raster.tif")
-            if "ship_threshold" in config_provider("renewable", w.technology)(w).keys()
-            else []
-        ),
-        country_shapes=resources("country_shapes.geojson"),
-        offshore_shapes=resources("offshore_shapes.geojson"),
-        regions=lambda w: (
-            resources("regions_onshore_base_s_{clusters}.geojson")
-            if w.technology in ("onwind", "solar", "solar-hsat")
-            else resources("regions_offshore_base_s_{clusters}.geojson")
-        ),
+        unpack(input_availability_matrix_base),
+        unpack(input_availability_exclusions),
+        regions=input_availability_regions,
         cutout=lambda w: input_cutout(
             w, config_provider("renewable", w.technology, "cutout")(w)
         ),
@@ -340,11 +354,21 @@ rule determine_availability_matrix:
         "../scripts/determine_availability_matrix.py"
 
 
+use rule determine_availability_matrix as determine_availability_matrix_base_s with:
+    output:
+        resources("availability_matrix_base_s_{technology}.nc"),
+    log:
+        logs("determine_availability_matrix_base_s_{technology}.log"),
+    benchmark:
+        benchmarks("determine_availability_matrix_base_s_{technology}")
+
+
 rule build_renewable_profiles:
     params:
         snapshots=config_provider("snapshots"),
         drop_leap_day=config_provider("enable", "drop_leap_day"),
         renewable=config_provider("renewable"),
+        distance_cache=resources("renewable_distance_cache"),
     input:
         availability_matrix=resources("availability_matrix_{clusters}_{technology}.nc"),
         offshore_shapes=resources("offshore_shapes.geojson"),
@@ -427,6 +451,7 @@ rule build_line_rating:
     params:
         snapshots=config_provider("snapshots"),
         drop_leap_day=config_provider("enable", "drop_leap_day"),
+        intersection_cache=resources("dlr_intersection_cache"),
     input:
         base_network=resources("networks/base.nc"),
         cutout=lambda w: input_cutout(
@@ -806,6 +831,8 @@ rule prepare_network:
 if config["electricity"]["base_network"] == "osm-raw":
 
     rule clean_osm_data:
+        params:
+            elements_cache=resources("osm-raw/clean/cache"),
         input:
             cables_way=expand(
                 "data/osm-raw/{country}/cables_way.json",
@@ -177,7 +177,7 @@ rule build_hourly_heat_demand:
         drop_leap_day=config_provider("enable", "drop_leap_day"),
     input:
         heat_profile="data/heat_load_profile_BDEW.csv",
-        heat_demand=resources("daily_heat_demand_total_base_s_{clusters}.nc"),
+        heat_demand=input_cutout_aggregate("daily_heat_demand"),
     output:
         heat_demand=resources("hourly_heat_demand_total_base_s_{clusters}.nc"),
     resources:
@@ -219,6 +219,68 @@ rule build_temperature_profiles:
         "../scripts/build_temperature_profiles.py"
 
 
+rule build_cutout_aggregates:
+    params:
+        snapshots=config_provider("snapshots"),
+        drop_leap_day=config_provider("enable", "drop_leap_day"),
+    input:
+        pop_layout=resources("pop_layout_total.nc"),
+        regions_onshore=resources("regions_onshore_base_s_{clusters}.geojson"),
+        cutout=lambda w: input_cutout(
+            w, config_provider("sector", "heat_demand_cutout")(w)
+        ),
+    output:
+        heat_demand=resources(
+            "cutout_aggregates/daily_heat_demand_total_base_s_{clusters}.nc"
+        ),
+        temp_soil=resources("cutout_aggregates/temp_soil_total_base_s_{clusters}.nc"),
+        temp_air=resources("cutout_aggregates/temp_air_total_base_s_{clusters}.nc"),
+    resources:
+        mem_mb=20000,
+    threads: 16
+    log:
+        logs("build_cutout_aggregates_total_s_{clusters}.log"),
+    benchmark:
+        benchmarks("build_cutout_aggregates/total_{clusters}")
+    conda:
+        "../envs/environment.yaml"
+    script:
+        "../scripts/build_cutout_aggregates.py"
+
+
+use rule build_cutout_aggregates as build_cutout_aggregates_solar_thermal with:
+    params:
+        snapshots=config_provider("snapshots"),
+        drop_leap_day=config_provider("enable", "drop_leap_day"),
+        solar_thermal=config_provider("solar_thermal"),
+    input:
+        pop_layout=resources("pop_layout_total.nc"),
+        regions_onshore=resources("regions_onshore_base_s_{clusters}.geojson"),
+        cutout=lambda w: input_cutout(
+            w, config_provider("sector", "heat_demand_cutout")(w)
+        ),
+        solar_thermal_cutout=lambda w: input_cutout(
+            w, config_provider("solar_thermal", "cutout")(w)
+        ),
+    output:
+        heat_demand=resources(
+            "cutout_aggregates_solar_thermal/daily_heat_demand_total_base_s_{clusters}.nc"
+        ),
+        temp_soil=resources(
+            "cutout_aggregates_solar_thermal/temp_soil_total_base_s_{clusters}.nc"
+        ),
+        temp_air=resources(
+            "cutout_aggregates_solar_thermal/temp_air_total_base_s_{clusters}.nc"
+        ),
+        solar_thermal=resources(
+            "cutout_aggregates_solar_thermal/solar_thermal_total_base_s_{clusters}.nc"
+        ),
+    log:
+        logs("build_cutout_aggregates_solar_thermal_total_s_{clusters}.log"),
+    benchmark:
+        benchmarks("build_cutout_aggregates_solar_thermal/total_{clusters}")
+
+
 rule build_central_heating_temperature_profiles:
     params:
         max_forward_temperature_central_heating_baseyear=config_provider(
@@ -267,7 +329,7 @@ rule build_central_heating_temperature_profiles:
         ),
         energy_totals_year=config_provider("energy", "energy_totals_year"),
     input:
-        temp_air_total=resources("temp_air_total_base_s_{clusters}.nc"),
+        temp_air_total=input_cutout_aggregate("temp_air"),
         regions_onshore=resources("regions_onshore_base_s_{clusters}.geojson"),
     output:
         central_heating_forward_temperature_profiles=resources(
@@ -436,8 +498,8 @@ rule build_cop_profiles:
         central_heating_return_temperature_profiles=resources(
             "central_heating_return_temperature_profiles_base_s_{clusters}_{planning_horizons}.nc"
         ),
-        temp_soil_total=resources("temp_soil_total_base_s_{clusters}.nc"),
-        temp_air_total=resources("temp_air_total_base_s_{clusters}.nc"),
+        temp_soil_total=input_cutout_aggregate("temp_soil"),
+        temp_air_total=input_cutout_aggregate("temp_air"),
         temp_ptes_total=resources(
             "ptes_top_temperature_profiles_s_{clusters}_{planning_horizons}.nc"
         ),
@@ -1016,7 +1078,7 @@ rule build_retro_cost:
     input:
         building_stock="data/retro/data_building_stock.csv",
         data_tabula="data/bundle/retro/tabula-calculator-calcsetbuilding.csv",
-        air_temperature=resources("temp_air_total_base_s_{clusters}.nc"),
+        air_temperature=input_cutout_aggregate("temp_air"),
         u_values_PL="data/retro/u_values_poland.csv",
         tax_w="data/retro/electricity_taxes_eu.csv",
         construction_index="data/retro/comparative_level_investment.csv",
@@ -1098,7 +1160,7 @@ rule build_transport_demand:
         transport_data=resources("transport_data.csv"),
         traffic_data_KFZ="data/bundle/emobility/KFZ__count",
         traffic_data_Pkw="data/bundle/emobility/Pkw__count",
-        temp_air_total=resources("temp_air_total_base_s_{clusters}.nc"),
+        temp_air_total=input_cutout_aggregate("temp_air"),
     output:
         transport_demand=resources("transport_demand_s_{clusters}.csv"),
         transport_data=resources("transport_data_s_{clusters}.csv"),
@@ -1189,7 +1251,7 @@ rule time_aggregation:
             else []
         ),
         solar_thermal_total=lambda w: (
-            resources("solar_thermal_total_base_s_{clusters}.nc")
+            input_cutout_aggregate("solar_thermal")(w)
             if config_provider("sector", "solar_thermal")(w)
             else []
         ),
@@ -1228,7 +1290,7 @@ rule build_egs_potentials:
         egs_cost="data/egs_costs.json",
         regions=resources("regions_onshore_base_s_{clusters}.geojson"),
         air_temperature=(
-            resources("temp_air_total_base_s_{clusters}.nc")
+            input_cutout_aggregate("temp_air")
             if config_provider("sector", "enhanced_geothermal", "var_cf")
             else []
         ),
@@ -1368,8 +1430,8 @@ rule prepare_sector_network:
             "district_heat_share_base_s_{clusters}_{planning_horizons}.csv"
         ),
         heating_efficiencies=resources("heating_efficiencies.csv"),
-        temp_soil_total=resources("temp_soil_total_base_s_{clusters}.nc"),
-        temp_air_total=resources("temp_air_total_base_s_{clusters}.nc"),
+        temp_soil_total=input_cutout_aggregate("temp_soil"),
+        temp_air_total=input_cutout_aggregate("temp_air"),
         cop_profiles=resources("cop_profiles_base_s_{clusters}_{planning_horizons}.nc"),
         ptes_e_max_pu_profiles=lambda w: (
             resources(
@@ -1390,7 +1452,7 @@ rule prepare_sector_network:
             else []
         ),
         solar_thermal_total=lambda w: (
-            resources("solar_thermal_total_base_s_{clusters}.nc")
+            input_cutout_aggregate("solar_thermal")(w)
             if config_provider("sector", "solar_thermal")(w)
             else []
         ),
@@ -1422,7 +1484,7 @@ rule prepare_sector_network:
             if config_provider("sector", "district_heating", "ates", "enable")(w)
             else []
         ),
-        hourly_fuel_costs=resources("hourly_fuel_costs_with_lignite.csv"),
+        hourly_fuel_costs=resources("hourly_fuel_prices.nc"),
         hourly_co2_prices="validation/ember_data/hourly_co2_prices_with_snapshots_2023.csv",
         chp_data="validation/ember_data/combined_chp.csv",
         ember_ntc_csv="validation/ember_data/ntc.csv",
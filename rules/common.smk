@@ -113,6 +113,40 @@ def input_custom_extra_functionality(w):
     return []
 
 
+def input_cross_border_energy(w):
+    if config_provider(
+        "ember_settings", "ntc_cross_country_pf_restriction", default=False
+    )(w):
+        return {
+            "cross_border_energy": config_provider(
+                "ember_settings",
+                "cross_border_energy",
+                default="validation/ember_data/cross_border_energy.csv",
+            )(w)
+        }
+    return {}
+
+
+def input_cutout_aggregate(name):
+    """
+    Input function for the regional time series ``name`` (e.g. ``temp_air``),
+    built by the separate rule or by ``build_cutout_aggregates`` if
+    ``sector: fused_cutout_aggregation:`` is enabled.
+    """
+
+    def input_path(w):
+        fn = f"{name}_total_base_s_{{clusters}}.nc"
+        if not config_provider("sector", "fused_cutout_aggregation", default=False)(
+            w
+        ):
+            return resources(fn)
+        if config_provider("sector", "solar_thermal")(w):
+            return resources("cutout_aggregates_solar_thermal/" + fn)
+        return resources("cutout_aggregates/" + fn)
+
+    return input_path
+
+
 def has_internet_access(url: str = "https://www.zenodo.org", timeout: int = 5) -> bool:
     """
     Checks if internet connection is available by sending a HEAD request
@@ -77,10 +77,16 @@ rule download_hotmaps:
         """
 
 rule hourly_lignite_prices:
+    params:
+        snapshots=config_provider("snapshots"),
+        drop_leap_day=config_provider("enable", "drop_leap_day"),
+        fuel_costs=config_provider("costs", "fuel", default={}),
     input:
         "validation/ember_data/hourly_fuel_costs.csv"
     output:
-        resources("hourly_fuel_costs_with_lignite.csv")
+        resources("hourly_fuel_prices.nc")
+    log:
+        logs("hourly_lignite_prices.log"),
     script:
         "../scripts/hourly_lignite.py"
 
@@ -12,6 +12,7 @@ rule solve_network:
         ),
         custom_extra_functionality=input_custom_extra_functionality,
     input:
+        unpack(input_cross_border_energy),
         network=resources("networks/base_s_{clusters}_elec_{opts}.nc"),
     output:
         network=RESULTS + "networks/base_s_{clusters}_elec_{opts}.nc",
@@ -46,6 +47,7 @@ rule solve_operations_network:
         ),
         custom_extra_functionality=input_custom_extra_functionality,
     input:
+        unpack(input_cross_border_energy),
         network=RESULTS + "networks/base_s_{clusters}_elec_{opts}.nc",
     output:
         network=RESULTS + "networks/base_s_{clusters}_elec_{opts}_op.nc",
@@ -30,6 +30,11 @@ rule add_existing_baseyear:
             "existing_heating_distribution_base_s_{clusters}_{planning_horizons}.csv"
         ),
         heating_efficiencies=resources("heating_efficiencies.csv"),
+        hourly_fuel_costs=lambda w: (
+            resources("hourly_fuel_prices.nc")
+            if config_provider("ember_settings", "ember_gas_price", default=False)(w)
+            else []
+        ),
     output:
         resources(
             "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}_brownfield.nc"
@@ -64,6 +69,61 @@ def input_profile_tech_brownfield(w):
     }
 
 
+def brownfield_prefetch(w):
+    return config_provider("existing_capacities", "brownfield_prefetch", default=False)(
+        w
+    )
+
+
+def input_network_brownfield(w):
+    if brownfield_prefetch(w):
+        return resources(
+            "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}_brownfield_prefetch.nc"
+        )
+    return resources(
+        "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}.nc"
+    )
+
+
+def input_profile_tech_add_brownfield(w):
+    if brownfield_prefetch(w):
+        return {}
+    return input_profile_tech_brownfield(w)
+
+
+rule prefetch_brownfield_network:
+    params:
+        snapshots=config_provider("snapshots"),
+        drop_leap_day=config_provider("enable", "drop_leap_day"),
+        carriers=config_provider("electricity", "renewable_carriers"),
+    input:
+        unpack(input_profile_tech_brownfield),
+        network=resources(
+            "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}.nc"
+        ),
+    output:
+        temp(
+            resources(
+                "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}_brownfield_prefetch.nc"
+            )
+        ),
+    threads: 1
+    resources:
+        mem_mb=10000,
+    log:
+        logs(
+            "prefetch_brownfield_network_base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}.log"
+        ),
+    benchmark:
+        benchmarks(
+            "prefetch_brownfield_network/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}"
+        )
+    conda:
+        "../envs/environment.yaml"
+    script:
+        "../scripts/prefetch_brownfield_network.py"
+
+
 rule add_brownfield:
     params:
         H2_retrofit=config_provider("sector", "H2_retrofit"),
@@ -79,13 +139,12 @@ rule add_brownfield:
         dynamic_ptes_capacity=config_provider(
             "sector", "district_heating", "ptes", "dynamic_capacity"
         ),
+        brownfield_prefetch=brownfield_prefetch,
     input:
-        unpack(input_profile_tech_brownfield),
+        unpack(input_profile_tech_add_brownfield),
         simplify_busmap=resources("busmap_base_s.csv"),
         cluster_busmap=resources("busmap_base_s_{clusters}.csv"),
-        network=resources(
-            "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}.nc"
-        ),
+        network=input_network_brownfield,
         network_p=solved_previous_horizon,  #solved network at previous time step
         costs=resources("costs_{planning_horizons}.csv"),
         cop_profiles=resources("cop_profiles_base_s_{clusters}_{planning_horizons}.nc"),
@@ -122,6 +181,7 @@ rule solve_sector_network_myopic:
         ),
         custom_extra_functionality=input_custom_extra_functionality,
     input:
+        unpack(input_cross_border_energy),
         network=resources(
             "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}_brownfield.nc"
         ),
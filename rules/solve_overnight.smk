@@ -13,6 +13,7 @@ rule solve_sector_network:
         custom_extra_functionality=input_custom_extra_functionality,
         hourly_price_fix=config_provider("ember_settings", "hourly_price_fix")
     input:
+        unpack(input_cross_border_energy),
         network=resources(
             "networks/base_s_{clusters}_{opts}_{sector_opts}_{planning_horizons}.nc"
         ),
@@ -11,15 +11,16 @@ import re
 import time
 from functools import partial, wraps
 from pathlib import Path
-from tempfile import NamedTemporaryFile
 from typing import Callable, Union
 
 import atlite
 import fiona
+import numpy as np
 import pandas as pd
 import pypsa
 import pytz
 import requests
+import scipy.sparse as sp
 import xarray as xr
 import yaml
 from snakemake.utils import update_config
@@ -610,18 +611,22 @@ def generate_periodic_profiles(dt_index, nodes, weekly_profile, localize=None):
     Give a 24*7 long list of weekly hourly profiles, generate this for each
     country for the period dt_index, taking account of time zones and summer
     time.
+
+    The hour of the week is computed once per distinct time zone and
+    broadcast to all nodes in that time zone.
     """
-    weekly_profile = pd.Series(weekly_profile, range(24 * 7))
+    weekly_profile = pd.Series(weekly_profile, range(24 * 7)).values
 
-    week_df = pd.DataFrame(index=dt_index, columns=nodes)
+    countries = pd.Index(nodes).str[:2].str.replace("XK", "RS")
+    timezones = countries.map(lambda ct: pytz.country_timezones[ct][0])
+    codes, uniques = pd.factorize(timezones)
 
-    for node in nodes:
-        ct = node[:2] if node[:2] != "XK" else "RS"
-        timezone = pytz.timezone(pytz.country_timezones[ct][0])
+    profiles = np.empty((len(dt_index), len(uniques)), dtype=weekly_profile.dtype)
+    for i, timezone in enumerate(uniques):
         tz_dt_index = dt_index.tz_convert(timezone)
-        week_df[node] = [24 * dt.weekday() + dt.hour for dt in tz_dt_index]
-        week_df[node] = week_df[node].map(weekly_profile)
+        profiles[:, i] = weekly_profile[24 * tz_dt_index.weekday + tz_dt_index.hour]
 
+    week_df = pd.DataFrame(profiles[:, codes], index=dt_index, columns=nodes)
     week_df = week_df.tz_localize(localize)
 
     return week_df
@@ -1055,6 +1060,11 @@ def load_cutout(
     """
     Load and optionally combine multiple cutout files.
 
+    Multiple cutout files are combined lazily: each file is opened with dask
+    chunks along time, the requested times are selected per file and files
+    without any of them are skipped before concatenating. Time-invariant
+    variables are taken from the first file without comparing them.
+
     Parameters
     ----------
     cutout_files : str or list of str
@@ -1071,11 +1081,129 @@ def load_cutout(
     if isinstance(cutout_files, str):
         cutout = atlite.Cutout(cutout_files)
     elif isinstance(cutout_files, list):
-        cutout_da = [atlite.Cutout(c).data for c in cutout_files]
-        combined_data = xr.concat(cutout_da, dim="time", data_vars="minimal")
-        cutout = atlite.Cutout(NamedTemporaryFile().name, data=combined_data)
+        cutout_da = []
+        for fn in cutout_files:
+            data = atlite.Cutout(fn).data
+            if time is not None:
+                data = data.sel(time=data.indexes["time"].intersection(time))
+                if not data.sizes["time"]:
+                    continue
+            cutout_da.append(data)
+        if not cutout_da:
+            raise ValueError(
+                f"None of the cutouts {cutout_files} cover the given time."
+            )
+        combined_data = xr.concat(
+            cutout_da,
+            dim="time",
+            data_vars="minimal",
+            coords="minimal",
+            compat="override",
+        )
+        # the path is never written, it must only not point to an existing file
+        path = Path(cutout_files[0]).with_name(
+            "+".join(Path(fn).stem for fn in cutout_files) + ".nc"
+        )
+        cutout = atlite.Cutout(path, data=combined_data)
 
     if time is not None:
         cutout.data = cutout.data.sel(time=time)
 
     return cutout
+
+
+def population_weighted_matrix(
+    indicator: sp.spmatrix, pop_layout: xr.DataArray, normalize: bool = True
+) -> sp.csr_matrix:
+    """
+    Build a sparse matrix to aggregate cutout cells to regions by population.
+
+    Each region's row of the indicator matrix is scaled by the population of
+    the region using a sparse diagonal matrix. This avoids dense matrices of
+    size cells times regions on large cutouts.
+
+    Parameters
+    ----------
+    indicator : scipy.sparse.spmatrix
+        Indicator matrix of shape (regions, cells) from
+        :meth:`atlite.Cutout.indicatormatrix`.
+    pop_layout : xr.DataArray
+        Population layout on the cutout grid with dimensions (y, x).
+    normalize : bool, default True
+        Whether to normalize the weights of each region to sum to one.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Aggregation matrix of shape (regions, cells), to be passed as
+        ``matrix`` to atlite conversion functions.
+    """
+    stacked_pop = pop_layout.stack(spatial=("y", "x")).values
+    indicator = sp.csr_matrix(indicator)
+    matrix = sp.diags(indicator.dot(stacked_pop)) @ indicator
+
+    if normalize:
+        total = np.asarray(matrix.sum(axis=1)).ravel()
+        total[total == 0.0] = 1.0
+        matrix = sp.diags(1 / total) @ matrix
+
+    return matrix.tocsr()
+
+
+def load_or_compute(
+    compute: Callable[[], object],
+    cache_dir: Union[str, None],
+    key: list[Union[bytes, str]],
+    read: Callable[[str], object],
+    write: Callable[[object, str], None],
+    suffix: str = "",
+) -> object:
+    """
+    Return the result of ``compute``, cached in ``cache_dir``.
+
+    Every result is stored in its own file named by the SHA-256 hash of
+    ``key`` and written once through a temporary file, so that parallel jobs
+    neither read partial files nor overwrite each other's results. The cache
+    is not tracked by Snakemake and therefore also reused by ``--forcerun``;
+    ``key`` must thus cover all inputs of ``compute`` and a format version
+    to be bumped whenever the computation changes.
+
+    Parameters
+    ----------
+    compute : callable
+        Function without arguments computing the result.
+    cache_dir : str or None
+        Directory of the cache. If None, ``compute`` is called without
+        caching.
+    key : list of bytes or str
+        Parts of the cache key.
+    read : callable
+        Function reading a result from a path.
+    write : callable
+        Function writing a result to a path.
+    suffix : str, default ""
+        File name suffix of the cached results.
+
+    Returns
+    -------
+    object
+        Result of ``compute``.
+    """
+    if cache_dir is None:
+        return compute()
+
+    h = hashlib.sha256()
+    for part in key:
+        part = part.encode() if isinstance(part, str) else part
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    fn = os.path.join(cache_dir, h.hexdigest() + suffix)
+    if os.path.exists(fn):
+        return read(fn)
+
+    result = compute()
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{fn}.{os.getpid()}.tmp"
+    write(result, tmp)
+    os.replace(tmp, fn)
+    return result
@@ -156,6 +156,32 @@ def add_brownfield(
             n.links.loc[gas_pipes_i, "p_nom_max"] = remaining_capacity
 
 
+def prefetch_brownfield_network(n, input_profiles, params, year):
+    """
+    Apply all brownfield modifications that do not depend on the solved
+    network of the previous planning horizon.
+
+    With ``existing_capacities: brownfield_prefetch`` these run in the rule
+    ``prefetch_brownfield_network`` while the previous horizon is still being
+    solved, so that only the brownfield capacities remain on the critical
+    path of the myopic pathway.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+        Network of the current planning horizon
+    input_profiles : snakemake.io.InputFiles
+        Renewable profiles by carrier (``profile_{carrier}``)
+    params : snakemake.io.Params
+        Parameters with ``snapshots``, ``drop_leap_day`` and ``carriers``
+    year : int
+        Planning year
+    """
+    adjust_renewable_profiles(n, input_profiles, params, year)
+
+    add_build_year_to_new_assets(n, year)
+
+
 def disable_grid_expansion_if_limit_hit(n):
     """
     Check if transmission expansion limit is already reached; then turn off.
@@ -344,15 +370,14 @@ if __name__ == "__main__":
 
     update_config_from_wildcards(snakemake.config, snakemake.wildcards)
 
-    logger.info(f"Preparing brownfield from the file {snakemake.input.network_p}")
-
     year = int(snakemake.wildcards.planning_horizons)
 
     n = pypsa.Network(snakemake.input.network)
 
-    adjust_renewable_profiles(n, snakemake.input, snakemake.params, year)
+    if not snakemake.params.get("brownfield_prefetch", False):
+        prefetch_brownfield_network(n, snakemake.input, snakemake.params, year)
 
-    add_build_year_to_new_assets(n, year)
+    logger.info(f"Preparing brownfield from the file {snakemake.input.network_p}")
 
     n_p = pypsa.Network(snakemake.input.network_p)
 
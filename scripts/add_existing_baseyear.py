@@ -26,6 +26,7 @@ from scripts._helpers import (
 from scripts.add_electricity import load_costs, sanitize_carriers
 from scripts.build_energy_totals import cartesian
 from scripts.definitions.heat_system import HeatSystem
+from scripts.ember_customization import apply_hourly_fuel_prices
 from scripts.prepare_sector_network import cluster_heat_buses, define_spatial
 
 logger = logging.getLogger(__name__)
@@ -803,6 +804,17 @@ if __name__ == "__main__":
 
     n.meta = dict(snakemake.config, **dict(wildcards=dict(snakemake.wildcards)))
 
+    # price the fuel of the existing capacities like in prepare_sector_network
+    ember_settings = snakemake.config.get("ember_settings", {})
+    if ember_settings.get("ember_gas_price", False):
+        apply_hourly_fuel_prices(
+            n,
+            costs,
+            carriers=["gas", "coal", "lignite"],
+            fn_hourly_prices=snakemake.input.hourly_fuel_costs,
+            mode=ember_settings.get("hourly_fuel_price_mode", "fuel_bus"),
+        )
+
     sanitize_custom_columns(n)
     sanitize_carriers(n, snakemake.config)
     n.export_to_netcdf(snakemake.output[0])
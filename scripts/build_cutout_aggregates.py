@@ -0,0 +1,190 @@
+# SPDX-FileCopyrightText: Contributors to PyPSA-Eur <https://github.com/pypsa/pypsa-eur>
+#
+# SPDX-License-Identifier: MIT
+"""
+Build population-weighted regional time series of air and soil temperature,
+daily heat demand and solar thermal generation from a single pass over the
+cutout.
+
+This rule produces the same outputs as :mod:`build_temperature_profiles`,
+:mod:`build_daily_heat_demand` and :mod:`build_solar_thermal_profiles`. Instead
+of streaming the weather data once per rule, the conversions are combined into
+one dask graph, so that each cutout chunk is read only once. It is used instead
+of the separate rules if ``sector: fused_cutout_aggregation:`` is enabled. The
+variant ``build_cutout_aggregates_solar_thermal`` also builds the solar thermal
+profiles and is used if ``sector: solar_thermal:`` is enabled.
+
+Inputs
+------
+
+- ``resources/<run_name>/pop_layout_total.nc``: Population layout (spatial population distribution).
+- ``resources/<run_name>/regions_onshore_base_s_<clusters>.geojson``: Onshore region shapes.
+- ``cutout``: Weather data cutout, as specified in config ``sector: heat_demand_cutout:``.
+- ``solar_thermal_cutout``: Weather data cutout, as specified in config ``solar_thermal: cutout:`` (only with solar thermal).
+
+Outputs
+-------
+
+- ``resources/cutout_aggregates/daily_heat_demand_total_base_s_<clusters>.nc``
+- ``resources/cutout_aggregates/temp_soil_total_base_s_<clusters>.nc``
+- ``resources/cutout_aggregates/temp_air_total_base_s_<clusters>.nc``
+
+With solar thermal, the same outputs and
+``solar_thermal_total_base_s_<clusters>.nc`` are written to
+``resources/cutout_aggregates_solar_thermal/``.
+"""
+
+import inspect
+import logging
+
+import dask
+import geopandas as gpd
+import xarray as xr
+from atlite.aggregate import aggregate_matrix
+from atlite.convert import (
+    convert_heat_demand,
+    convert_soil_temperature,
+    convert_solar_thermal,
+    convert_temperature,
+    solar_thermal,
+)
+from atlite.pv.orientation import get_orientation
+from dask.distributed import Client, LocalCluster
+
+from scripts._helpers import (
+    configure_logging,
+    get_snapshots,
+    load_cutout,
+    population_weighted_matrix,
+    set_scenario_config,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def solar_thermal_kwargs(config):
+    """
+    Keyword arguments for :func:`atlite.convert.convert_solar_thermal` from
+    the ``solar_thermal`` config section, falling back to the defaults of
+    :meth:`atlite.Cutout.solar_thermal` for unset values.
+    """
+    defaults = inspect.signature(solar_thermal).parameters
+    kwargs = {
+        key: config.get(key, defaults[key].default)
+        for key in inspect.signature(convert_solar_thermal).parameters
+        if key != "ds"
+    }
+    kwargs["orientation"] = get_orientation(config["orientation"])
+    return kwargs
+
+
+def aggregate(da, matrix, index):
+    """
+    Lazily aggregate a converted cutout variable to regions.
+    """
+    result = aggregate_matrix(da, matrix=matrix, index=index)
+    result.attrs["units"] = "MW"
+    return result
+
+
+def cutout_aggregates(
+    cutout, regions, pop_layout, solar_cutout=None, solar_thermal_config=None
+):
+    """
+    Set up the lazy regional time series of all cutout-derived quantities.
+
+    Parameters
+    ----------
+    cutout : atlite.Cutout
+        Cutout for temperatures and heat demand.
+    regions : gpd.GeoSeries
+        Regions indexed by name.
+    pop_layout : xr.DataArray
+        Population layout on the cutout grid.
+    solar_cutout : atlite.Cutout, optional
+        Cutout for solar thermal generation, may be the same as ``cutout``.
+        Solar thermal is skipped if not given.
+    solar_thermal_config : dict, optional
+        The ``solar_thermal`` config section.
+
+    Returns
+    -------
+    dict of xr.DataArray
+        Dask-backed hourly ``temp_air``, ``temp_soil``, optionally
+        ``solar_thermal``, and daily ``heat_demand`` per region, to be computed
+        together.
+    """
+    I = cutout.indicatormatrix(regions)  # noqa: E741
+    M = population_weighted_matrix(I, pop_layout)
+    M_heat = population_weighted_matrix(I, pop_layout, normalize=False)
+
+    ds = cutout.data
+    heat_demand = convert_heat_demand(
+        ds, threshold=15.0, a=1.0, constant=0.0, hour_shift=0.0
+    )
+    aggregates = {
+        "temp_air": aggregate(convert_temperature(ds), M, regions.index),
+        "temp_soil": aggregate(convert_soil_temperature(ds), M, regions.index),
+        "heat_demand": aggregate(heat_demand, M_heat, regions.index),
+    }
+
+    if solar_cutout is not None:
+        if solar_cutout is cutout:
+            M_solar = M
+        else:
+            I_solar = solar_cutout.indicatormatrix(regions)
+            M_solar = population_weighted_matrix(I_solar, pop_layout)
+        kwargs = solar_thermal_kwargs(solar_thermal_config)
+        aggregates["solar_thermal"] = aggregate(
+            convert_solar_thermal(solar_cutout.data, **kwargs), M_solar, regions.index
+        )
+
+    return aggregates
+
+
+if __name__ == "__main__":
+    if "snakemake" not in globals():
+        from scripts._helpers import mock_snakemake
+
+        snakemake = mock_snakemake("build_cutout_aggregates", clusters=48)
+    configure_logging(snakemake)
+    set_scenario_config(snakemake)
+
+    nprocesses = int(snakemake.threads)
+    cluster = LocalCluster(n_workers=nprocesses, threads_per_worker=1)
+    client = Client(cluster, asynchronous=True)
+
+    time = get_snapshots(snakemake.params.snapshots, snakemake.params.drop_leap_day)
+    daily = get_snapshots(
+        snakemake.params.snapshots,
+        snakemake.params.drop_leap_day,
+        freq="D",
+    )
+
+    cutout = load_cutout(snakemake.input.cutout, time=time)
+    if "solar_thermal" not in snakemake.output.keys():
+        solar_cutout = None
+    elif snakemake.input.solar_thermal_cutout == snakemake.input.cutout:
+        solar_cutout = cutout
+    else:
+        solar_cutout = load_cutout(snakemake.input.solar_thermal_cutout, time=time)
+
+    clustered_regions = (
+        gpd.read_file(snakemake.input.regions_onshore).set_index("name").buffer(0)
+    )
+    pop_layout = xr.open_dataarray(snakemake.input.pop_layout)
+
+    outputs = cutout_aggregates(
+        cutout,
+        clustered_regions,
+        pop_layout,
+        solar_cutout=solar_cutout,
+        solar_thermal_config=snakemake.params.get("solar_thermal"),
+    )
+    outputs["heat_demand"] = outputs["heat_demand"].sel(time=daily)
+
+    logger.info(f"Aggregate {', '.join(outputs)} in a single pass over the cutout.")
+    results = dask.compute(*outputs.values(), scheduler=client)
+
+    for key, result in zip(outputs, results):
+        result.to_netcdf(snakemake.output[key])
@@ -17,7 +17,6 @@ Heat demand is distributed by population to clustered onshore regions.
 import logging
 
 import geopandas as gpd
-import numpy as np
 import xarray as xr
 from dask.distributed import Client, LocalCluster
 
@@ -25,6 +24,7 @@ from scripts._helpers import (
     configure_logging,
     get_snapshots,
     load_cutout,
+    population_weighted_matrix,
     set_scenario_config,
 )
 
@@ -65,11 +65,10 @@ if __name__ == "__main__":
 
     pop_layout = xr.open_dataarray(snakemake.input.pop_layout)
 
-    stacked_pop = pop_layout.stack(spatial=("y", "x"))
-    M = I.T.dot(np.diag(I.dot(stacked_pop)))
+    M = population_weighted_matrix(I, pop_layout, normalize=False)
 
     heat_demand = cutout.heat_demand(
-        matrix=M.T,
+        matrix=M,
         index=clustered_regions.index,
         dask_kwargs=dict(scheduler=client),
         show_progress=False,
@@ -31,8 +31,14 @@ import re
 import atlite
 import geopandas as gpd
 import numpy as np
+import pandas as pd
 import pypsa
+import shapely
 import xarray as xr
+from atlite.convert import convert_line_rating, line_azimuth_degrees
+from atlite.pv.solar_position import SolarPosition
+from dask import compute, delayed
+from dask.diagnostics import ProgressBar
 from dask.distributed import Client
 from shapely.geometry import LineString as Line
 from shapely.geometry import Point
@@ -41,6 +47,7 @@ from scripts._helpers import (
     configure_logging,
     get_snapshots,
     load_cutout,
+    load_or_compute,
     set_scenario_config,
 )
 
@@ -69,11 +76,161 @@ def calculate_resistance(T, R_ref, T_ref: float | int = 293, alpha: float = 0.00
     return R_ref * (1 + alpha * (T - T_ref))
 
 
+def line_cell_intersections(
+    shapes: gpd.GeoSeries, cutout: atlite.Cutout, cache_dir: str | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Positional indices of intersecting lines and cutout grid cells.
+
+    The intersections only depend on the line geometries and the cutout grid,
+    so they are cached in ``cache_dir`` and reused for other weather years
+    and snapshots.
+
+    Parameters
+    ----------
+    shapes : gpd.GeoSeries
+        Line geometries.
+    cutout : atlite.Cutout
+    cache_dir : str, optional
+        Directory of the intersection cache.
+
+    Returns
+    -------
+    line_i, cell_i : np.ndarray
+        Line and cell (in the order of ``cutout.grid``) of each intersection,
+        sorted by line.
+    """
+
+    def compute():
+        intersections = cutout.intersectionmatrix(shapes).tocoo()
+        order = np.lexsort((intersections.col, intersections.row))
+        return xr.Dataset(
+            {
+                "line": ("intersection", intersections.row[order]),
+                "cell": ("intersection", intersections.col[order]),
+            }
+        )
+
+    ds = load_or_compute(
+        compute,
+        cache_dir,
+        key=[
+            "line-cell-intersections-v1",
+            b"".join(shapely.to_wkb(shapes.values)),
+            cutout.data.x.values.tobytes(),
+            cutout.data.y.values.tobytes(),
+        ],
+        read=xr.load_dataset,
+        write=lambda ds, fn: ds.to_netcdf(fn),
+        suffix=".nc",
+    )
+    return ds["line"].values, ds["cell"].values
+
+
+def _line_rating_chunk(
+    ds: xr.Dataset, cell_i: np.ndarray, starts: np.ndarray, params: pd.DataFrame
+) -> np.ndarray:
+    """
+    Minimum thermal rating along each line for one chunk of time steps.
+    """
+    solar_position = SolarPosition(ds)
+    data = {
+        k: ds[k].transpose("time", "spatial").values[:, cell_i]
+        for k in ["temperature", "wnd100m", "wnd_azimuth", "influx_direct"]
+    }
+    data["height"] = ds["height"].values[cell_i]
+    for k in ["altitude", "azimuth"]:
+        values = solar_position[k].transpose("time", "spatial").values
+        data[f"solar_{k}"] = values[:, cell_i]
+    Imax = convert_line_rating(data, *(params[c].values for c in params))
+    return np.minimum.reduceat(Imax, starts, axis=1)
+
+
+def line_rating(
+    cutout: atlite.Cutout,
+    shapes: gpd.GeoSeries,
+    line_resistance: pd.Series,
+    chunk_size: int = 168,
+    cache_dir: str | None = None,
+    show_progress: bool = False,
+    dask_kwargs: dict | None = None,
+    **params,
+) -> xr.DataArray:
+    """
+    Calculate the thermal current limit of lines like
+    :meth:`atlite.Cutout.line_rating`, but vectorised over all line-cell
+    intersections.
+
+    The weather data is only read for cells crossed by a line, and the heat
+    balance of all intersections is evaluated at once per chunk of
+    ``chunk_size`` time steps. The line-cell intersections are cached in
+    ``cache_dir``.
+
+    Parameters
+    ----------
+    cutout : atlite.Cutout
+    shapes : gpd.GeoSeries
+        Line geometries.
+    line_resistance : pd.Series
+        Conductor resistance in Ohm/m at the maximal conductor temperature.
+    chunk_size : int, default 168
+        Number of time steps evaluated together.
+    cache_dir : str, optional
+        Directory of the intersection cache.
+    show_progress : bool, default False
+    dask_kwargs : dict, optional
+        Keyword arguments passed to ``dask.compute``.
+    **params
+        Conductor parameters ``D``, ``Ts``, ``epsilon`` and ``alpha`` passed
+        to :func:`atlite.convert.convert_line_rating`.
+
+    Returns
+    -------
+    xr.DataArray
+        Maximal current in A with dimensions (line, time).
+    """
+    if dask_kwargs is None:
+        dask_kwargs = {}
+
+    line_i, cell_i = line_cell_intersections(shapes, cutout, cache_dir)
+    lines, starts = np.unique(line_i, return_index=True)
+    cells, cell_i = np.unique(cell_i, return_inverse=True)
+
+    azimuth = shapes.apply(line_azimuth_degrees)
+    azimuth = azimuth.where(azimuth >= 0, azimuth + 180.0)
+    params = pd.DataFrame({"psi": azimuth, "R": line_resistance}).assign(
+        **{"D": 0.028, "Ts": 373, "epsilon": 0.6, "alpha": 0.6} | params
+    )
+    assert params.notnull().all().all(), "Nan values encountered."
+    params = params.iloc[line_i]
+
+    variables = ["temperature", "wnd100m", "wnd_azimuth", "influx_direct", "height"]
+    data = cutout.data[variables].stack(spatial=["y", "x"]).isel(spatial=cells)
+    time = data.indexes["time"]
+    res = [
+        delayed(_line_rating_chunk)(
+            data.isel(time=slice(i, i + chunk_size)), cell_i, starts, params
+        )
+        for i in range(0, len(time), chunk_size)
+    ]
+    if show_progress:
+        with ProgressBar(minimum=2):
+            computed = compute(*res, **dask_kwargs)
+    else:
+        computed = compute(*res, **dask_kwargs)
+
+    Imax = np.full((len(shapes), len(time)), np.nan)
+    if computed:
+        Imax[lines] = np.concatenate(computed).T
+    return xr.DataArray(Imax, coords=[shapes.index, time]).assign_attrs(units="A")
+
+
 def calculate_line_rating(
     n: pypsa.Network,
     cutout: atlite.Cutout,
     show_progress: bool = True,
     dask_kwargs: dict = None,
+    cache_dir: str | None = None,
 ) -> xr.DataArray:
     """
     Calculates the maximal allowed power flow in each line for each time step
@@ -82,6 +239,7 @@ def calculate_line_rating(
     Parameters
     ----------
     n : pypsa.Network object containing information on grid
+    cache_dir : Directory to cache the intersections of lines and weather cells
 
     Returns
     -------
@@ -114,13 +272,15 @@ def calculate_line_rating(
         relevant_lines["n_bundle"] = relevant_lines["n_bundle"].fillna(1)
         R *= relevant_lines["n_bundle"]
         R = calculate_resistance(T=353, R_ref=R)
-    Imax = cutout.line_rating(
+    Imax = line_rating(
+        cutout,
         shapes,
         R,
         D=0.0218,
         Ts=353,
         epsilon=0.8,
         alpha=0.8,
+        cache_dir=cache_dir,
         show_progress=show_progress,
         dask_kwargs=dask_kwargs,
     )
@@ -155,5 +315,11 @@ if __name__ == "__main__":
 
     cutout = load_cutout(snakemake.input.cutout, time=time)
 
-    da = calculate_line_rating(n, cutout, show_progress, dask_kwargs)
+    da = calculate_line_rating(
+        n,
+        cutout,
+        show_progress,
+        dask_kwargs,
+        cache_dir=snakemake.params.get("intersection_cache"),
+    )
     da.to_netcdf(snakemake.output[0])
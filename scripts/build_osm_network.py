@@ -11,11 +11,12 @@ import networkx as nx
 import numpy as np
 import pandas as pd
 import pypsa
+import shapely
 from pyproj import Transformer
 from shapely import prepare
 from shapely.algorithms.polylabel import polylabel
-from shapely.geometry import LineString, MultiLineString, Point
-from shapely.ops import linemerge, split
+from shapely.geometry import LineString, MultiLineString
+from shapely.ops import linemerge
 from tqdm import tqdm
 
 from scripts._helpers import configure_logging, set_scenario_config
@@ -91,33 +92,26 @@ def _merge_identical_lines(lines):
         - pd.DataFrame: DataFrame with aggregated lines, where lines with identical geometries and voltage levels are merged.
     """
     lines_all = lines.copy()
-    lines_to_drop = []
 
     logger.info("Aggregating lines with identical geometries and voltage levels.")
-    for g_name, g_value in tqdm(
-        lines_all.groupby(["geometry", "voltage"]),
-        desc="Aggregating identical lines",
-        unit=" lines",
-    ):
-        line_ids = list(g_value["line_id"])
-
-        if len(line_ids) > 1:
-            # New aggregated line
-            lid_old = line_ids[0]
-            lid_agg = lid_old.split("-")[0]
-            circuits_agg = g_value["circuits"].sum()
-
-            # Update line with aggregated parameters
-            lines_all.loc[lines_all["line_id"] == lid_old, "line_id"] = lid_agg
-            lines_all.loc[lines_all["line_id"] == lid_agg, "circuits"] = circuits_agg
-
-            # Add other lines to lines to drop
-            lines_to_drop += line_ids[1:]
+    # Group by the WKB representation, which is much cheaper to hash than the
+    # geometries themselves
+    grouped = lines_all.groupby(
+        [lines_all.geometry.to_wkb(), lines_all["voltage"]], sort=False
+    )
+    n_lines = grouped["line_id"].transform("size")
+    circuits_agg = grouped["circuits"].transform("sum")
+    is_duplicate = grouped.cumcount() > 0
 
-    logger.info(f"In total {len(lines_to_drop)} lines aggregated.")
+    logger.info(f"In total {is_duplicate.sum()} lines aggregated.")
 
-    # Drop lines
-    lines_all = lines_all[~lines_all["line_id"].isin(lines_to_drop)]
+    # Keep first line of each group with aggregated parameters
+    is_aggregated = (n_lines > 1) & ~is_duplicate
+    lines_all.loc[is_aggregated, "line_id"] = (
+        lines_all.loc[is_aggregated, "line_id"].str.split("-").str[0]
+    )
+    lines_all.loc[is_aggregated, "circuits"] = circuits_agg[is_aggregated]
+    lines_all = lines_all[~is_duplicate].copy()
 
     # Update line ids to make them unique again
     # Add voltage suffix to line_id
@@ -170,6 +164,10 @@ def _split_linestring_by_point(linestring, points):
     """
     Splits a LineString geometry by multiple points.
 
+    Only points in the interior of the LineString split it. The points are
+    located along the line from the cumulative length of the segments they lie
+    on, so that self-touching lines are cut at every pass through a point.
+
     Parameters
     ----------
         - linestring (LineString): The LineString geometry to be split.
@@ -179,18 +177,59 @@ def _split_linestring_by_point(linestring, points):
     -------
         - list of LineString: A list of LineString geometries resulting from the split.
     """
-    list_linestrings = [linestring]
-
-    for p in points:
-        # execute split to all lines and store results
-        temp_list = [split(l, p) for l in list_linestrings]
-        # nest all geometries
-        list_linestrings = [lstring for tval in temp_list for lstring in tval.geoms]
-
-    return list_linestrings
+    points = np.asarray(points, dtype=object)
+    points = points[shapely.relate_pattern(linestring, points, "0********")]
+    if len(points) == 0:
+        return [linestring]
+
+    coords = shapely.get_coordinates(linestring)
+    segment_lines = shapely.linestrings(np.stack([coords[:-1], coords[1:]], axis=1))
+    vertex_position = np.concatenate([[0], np.cumsum(shapely.length(segment_lines))])
+
+    # Locate each point on every segment it lies on
+    segment_i, point_i = np.nonzero(
+        shapely.intersects(segment_lines[:, None], points[None, :])
+    )
+    position = vertex_position[segment_i] + shapely.line_locate_point(
+        segment_lines[segment_i], points[point_i]
+    )
+    order = np.argsort(position)
+    position, point_i = position[order], point_i[order]
+    # Drop the line ends and points found on two adjacent segments at a vertex
+    eps = 1e-9 * vertex_position[-1]
+    keep = (position > eps) & (position < vertex_position[-1] - eps)
+    keep[1:] &= np.diff(position) > eps
+    cut_position = position[keep]
+    cut_coords = shapely.get_coordinates(points[point_i[keep]])
+    if len(cut_position) == 0:
+        return [linestring]
+
+    # Each segment runs from one cut to the next, including all vertices in between
+    lower = np.concatenate([[-np.inf], cut_position])
+    upper = np.concatenate([cut_position, [np.inf]])
+    segments = []
+    for i in range(len(lower)):
+        inner = coords[(vertex_position > lower[i]) & (vertex_position < upper[i])]
+        start = cut_coords[i - 1 : i] if i > 0 else np.empty((0, 2))
+        end = cut_coords[i : i + 1]
+        segments.append(LineString(np.concatenate([start, inner, end])))
+
+    return segments
+
+
+def _segment_suffix(i):
+    """
+    Returns the line id suffix of the i-th segment of a split line, i.e. "-a"
+    to "-z" followed by "-aa", "-ab", ... for lines with more than 26 segments.
+    """
+    suffix = ""
+    i += 1
+    while i > 0:
+        i, r = divmod(i - 1, len(string.ascii_lowercase))
+        suffix = string.ascii_lowercase[r] + suffix
+    return f"-{suffix}"
 
 
-# TODO: Last old function to improve, either vectorise or parallelise
 def split_overpassing_lines(lines, buses, distance_crs=DISTANCE_CRS, tol=1):
     """
     Split overpassing lines by splitting them at nodes within a given tolerance,
@@ -209,77 +248,54 @@ def split_overpassing_lines(lines, buses, distance_crs=DISTANCE_CRS, tol=1):
     """
     lines = lines.copy()
     logger.info(f"Splitting lines over overpassing nodes (Tolerance {tol} m).")
-    lines_to_add = []
-    lines_to_split = []
 
     # TODO: In first draft, skip line splitting for lower voltage levels
     high_voltage_lines = lines.query("voltage >= 220000")
     if high_voltage_lines.empty:
         return lines
 
-    lines_epsgmod = high_voltage_lines.to_crs(distance_crs)
-    buses_epsgmod = buses.to_crs(distance_crs)
-    buses_sindex = buses_epsgmod.sindex
+    lines_epsgmod = np.asarray(high_voltage_lines.geometry.to_crs(distance_crs))
+    buses_epsgmod = buses.geometry.to_crs(distance_crs)
 
-    # set tqdm options for substation ids
-    tqdm_kwargs_substation_ids = dict(
-        ascii=False,
-        unit=" lines",
-        total=high_voltage_lines.shape[0],
-        desc="Splitting lines",
+    # Find all pairs of lines and buses within tolerance in a single query
+    line_i, bus_i = buses_epsgmod.sindex.query(
+        lines_epsgmod, predicate="dwithin", distance=tol
     )
 
-    for l in tqdm(high_voltage_lines.index, **tqdm_kwargs_substation_ids):
-        line_geom = lines_epsgmod.geometry.loc[l]
-
-        # Use spatial index for initial filtering
-        possible_matches = list(buses_sindex.intersection(line_geom.bounds))
-        if not possible_matches:
-            continue
-
-        nearby_buses = buses_epsgmod.iloc[possible_matches]
-        bus_in_tol_epsg = nearby_buses[nearby_buses.geometry.distance(line_geom) <= tol]
-
-        # Get boundary points
-        endpoint0 = line_geom.boundary.geoms[0]
-        endpoint1 = line_geom.boundary.geoms[1]
-
-        # Calculate distances
-        dist_to_ep0 = bus_in_tol_epsg.geometry.distance(endpoint0)
-        dist_to_ep1 = bus_in_tol_epsg.geometry.distance(endpoint1)
-
-        # exclude endings of the lines
-        bus_in_tol_epsg = bus_in_tol_epsg[(dist_to_ep0 > tol) | (dist_to_ep1 > tol)]
-
-        if not bus_in_tol_epsg.empty:
-            # add index of line to split
-            lines_to_split.append(l)
-
-            buses_locs = buses.geometry.loc[bus_in_tol_epsg.index]
-
-            # get new line geometries
-            new_geometries = _split_linestring_by_point(lines.geometry[l], buses_locs)
-            n_geoms = len(new_geometries)
-
-            # create temporary copies of the line
-            df_append = gpd.GeoDataFrame([lines.loc[l]] * n_geoms)
-            # update geometries
-            df_append["geometry"] = new_geometries
-            # update name of the line if there are multiple line segments
-            df_append["line_id"] = [
-                str(df_append["line_id"].iloc[0])
-                + (f"-{letter}" if n_geoms > 1 else "")
-                for letter in string.ascii_lowercase[:n_geoms]
-            ]
-
-            lines_to_add.append(df_append)
+    # exclude endings of the lines
+    bus_geoms = np.asarray(buses_epsgmod)[bus_i]
+    dist_to_ep0 = shapely.distance(
+        bus_geoms, shapely.get_point(lines_epsgmod[line_i], 0)
+    )
+    dist_to_ep1 = shapely.distance(
+        bus_geoms, shapely.get_point(lines_epsgmod[line_i], -1)
+    )
+    not_at_ends = (dist_to_ep0 > tol) | (dist_to_ep1 > tol)
+    line_i, bus_i = line_i[not_at_ends], bus_i[not_at_ends]
 
-    if not lines_to_add:
+    if len(line_i) == 0:
         return lines
 
-    df_to_add = gpd.GeoDataFrame(pd.concat(lines_to_add, ignore_index=True))
-    df_to_add.set_crs(lines.crs, inplace=True)
-    df_to_add.set_index(lines.index[-1] + df_to_add.index, inplace=True)
+    buses_locs = pd.Series(np.asarray(buses.geometry)[bus_i]).groupby(line_i)
+    lines_to_split = high_voltage_lines.index[list(buses_locs.groups)]
+
+    # get new line geometries
+    new_geometries = [
+        _split_linestring_by_point(lines.geometry[l], points.values)
+        for l, (_, points) in zip(lines_to_split, buses_locs)
+    ]
+    n_geoms = pd.Series([len(g) for g in new_geometries], index=lines_to_split)
+
+    # create copies of the lines for each segment
+    df_to_add = lines.loc[lines_to_split.repeat(n_geoms)]
+    df_to_add["geometry"] = list(itertools.chain.from_iterable(new_geometries))
+    # update name of the line if there are multiple line segments
+    suffixes = np.array([_segment_suffix(i) for i in range(n_geoms.max())])
+    segment = df_to_add.groupby(level=0).cumcount().values
+    is_split = df_to_add.index.map(n_geoms) > 1
+    df_to_add["line_id"] = df_to_add["line_id"].astype(str) + np.where(
+        is_split, suffixes[segment], ""
+    )
 
     # remove original lines
     lines.drop(lines_to_split, inplace=True)
@@ -723,42 +739,31 @@ def _merge_buses_to_stations(
     geo_to_dist = Transformer.from_crs(geo_crs, distance_crs, always_xy=True)
     dist_to_geo = Transformer.from_crs(distance_crs, geo_crs, always_xy=True)
 
-    for g_name, g_value in tqdm(
-        buses_all.groupby("station_id"), desc="Updating geometries", unit=" substations"
-    ):
-        voltages = sorted(
-            g_value["voltage"].unique(), reverse=True
-        )  # Sort voltags in descending order
-
-        if len(voltages) > 1:
-            poi_x, poi_y = geo_to_dist.transform(
-                g_value["poi"].values[0].x, g_value["poi"].values[0].y
-            )
-
-            for idx, v in enumerate(voltages):
-                poi_x_offset = poi_x + offset * np.sin(
-                    np.pi / 4 + 2 * np.pi * idx / len(voltages)
-                ).round(4)
-                poi_y_offset = poi_y + offset * np.cos(
-                    np.pi / 4 + 2 * np.pi * idx / len(voltages)
-                ).round(4)
-
-                poi_offset = Point(dist_to_geo.transform(poi_x_offset, poi_y_offset))
-
-                # Update bus_name
-                g_value.loc[g_value["voltage"] == v, "bus_id"] = (
-                    g_name + "-" + str(int(v / 1000))
-                )
-
-                # Update geometry
-                g_value.loc[g_value["voltage"] == v, "geometry"] = poi_offset
+    in_station = buses_all["station_id"].notna()
+    station_buses = buses_all[in_station]
+    grouped = station_buses.groupby("station_id")
+
+    # Position of each voltage level in descending order within its station
+    n_voltages = grouped["voltage"].transform("nunique")
+    idx = grouped["voltage"].rank(method="dense", ascending=False) - 1
+    poi = gpd.GeoSeries(grouped["poi"].transform("first"), crs=geo_crs)
+
+    poi_x, poi_y = geo_to_dist.transform(poi.x.values, poi.y.values)
+    angle = np.pi / 4 + 2 * np.pi * idx / n_voltages
+    poi_x_offset = poi_x + offset * np.sin(angle).round(4)
+    poi_y_offset = poi_y + offset * np.cos(angle).round(4)
+    poi_offset = gpd.points_from_xy(
+        *dist_to_geo.transform(poi_x_offset.values, poi_y_offset.values)
+    )
 
-            buses_all.loc[g_value.index, "bus_id"] = g_value["bus_id"]
-            buses_all.loc[g_value.index, "geometry"] = g_value["geometry"]
-        else:
-            v = voltages[0]
-            buses_all.loc[g_value.index, "bus_id"] = g_name + "-" + str(int(v / 1000))
-            buses_all.loc[g_value.index, "geometry"] = g_value["poi"]
+    buses_all.loc[in_station, "bus_id"] = (
+        station_buses["station_id"]
+        + "-"
+        + (station_buses["voltage"] / 1000).astype(int).astype(str)
+    ).values
+    buses_all.loc[in_station, "geometry"] = np.where(
+        n_voltages > 1, poi_offset, station_buses["poi"]
+    )
 
     return buses_all
 
@@ -12,12 +12,79 @@ import country_converter as coco
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 import xarray as xr
 
 from scripts._helpers import configure_logging, load_cutout, set_scenario_config
 
 logger = logging.getLogger(__name__)
 
+
+def split_urban_rural(Iinv, nuts3, pop_cells, density_cells, urban_fraction):
+    """
+    Split the population of grid cells into rural and urban population.
+
+    Within each country, the grid cells with lowest population density are
+    rural until the national rural fraction is reached. Cells shared by
+    several countries are split by their area share. All countries are
+    handled at once on the sparse cell-country shares.
+
+    Parameters
+    ----------
+    Iinv : scipy.sparse.spmatrix
+        Indicator matrix of shape (NUTS3 regions, grid cells).
+    nuts3 : gpd.GeoDataFrame
+        NUTS3 regions with columns ``country`` and ``pop``.
+    pop_cells : pd.Series
+        Population per grid cell.
+    density_cells : pd.Series
+        Population density per grid cell.
+    urban_fraction : pd.Series
+        Urban fraction of population per country.
+
+    Returns
+    -------
+    pop_rural, pop_urban : pd.Series
+        Rural and urban population per grid cell.
+    """
+    country_i, countries = pd.factorize(nuts3.country, sort=True)
+    countries = pd.Index(countries)
+    onehot = sp.csr_matrix(
+        (np.ones(len(country_i)), (np.arange(len(country_i)), country_i)),
+        shape=(len(nuts3), len(countries)),
+    )
+    shares = (sp.csr_matrix(Iinv).T @ onehot).tocoo()
+    shares.eliminate_zeros()
+    cell, ct, share = shares.row, shares.col, shares.data
+
+    density = share * density_cells.values[cell]
+    pop = share * pop_cells.values[cell]
+
+    # correct for imprecision of Iinv*I
+    pop_ct = nuts3.groupby("country")["pop"].sum().reindex(countries).values
+    pop_sum = np.bincount(ct, weights=pop, minlength=len(countries))
+    scale = np.divide(pop_ct, pop_sum, out=np.ones_like(pop_sum), where=pop_sum != 0)
+    pop *= scale[ct]
+    total = np.bincount(ct, weights=pop, minlength=len(countries))
+
+    # The first low density grid cells to reach rural fraction are rural
+    order = np.lexsort((density, ct))
+    cumsum = pd.Series(pop[order]).groupby(ct[order]).cumsum().values
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cumsum_fraction = cumsum / total[ct[order]]
+    rural_fraction = 1 - urban_fraction.reindex(countries).values
+    rural = np.zeros(len(pop), dtype=bool)
+    rural[order] = cumsum_fraction < rural_fraction[ct[order]]
+
+    n_cells = len(pop_cells)
+    pop_rural = np.bincount(cell, weights=np.where(rural, pop, 0.0), minlength=n_cells)
+    pop_urban = np.bincount(cell, weights=np.where(rural, 0.0, pop), minlength=n_cells)
+    return (
+        pd.Series(pop_rural, pop_cells.index),
+        pd.Series(pop_urban, pop_cells.index),
+    )
+
+
 cc = coco.CountryConverter()
 
 if __name__ == "__main__":
@@ -67,42 +134,14 @@ if __name__ == "__main__":
     # pop per km^2
     density_cells = pop_cells / cell_areas
 
-    # rural or urban population in grid cell
-    pop_rural = pd.Series(0.0, density_cells.index)
-    pop_urban = pd.Series(0.0, density_cells.index)
-
     for ct in countries:
         logger.debug(
             f"The urbanization rate for {ct} is {round(urban_fraction[ct] * 100)}%"
         )
 
-        indicator_nuts3_ct = nuts3.country.apply(lambda x: 1.0 if x == ct else 0.0)
-
-        indicator_cells_ct = pd.Series(Iinv.T.dot(indicator_nuts3_ct))
-
-        density_cells_ct = indicator_cells_ct * density_cells
-
-        pop_cells_ct = indicator_cells_ct * pop_cells
-
-        # correct for imprecision of Iinv*I
-        pop_ct = nuts3.loc[nuts3.country == ct, "pop"].sum()
-        if pop_cells_ct.sum() != 0:
-            pop_cells_ct *= pop_ct / pop_cells_ct.sum()
-
-        # The first low density grid cells to reach rural fraction are rural
-        asc_density_i = density_cells_ct.sort_values().index
-        asc_density_cumsum = (
-            pop_cells_ct.iloc[asc_density_i].cumsum() / pop_cells_ct.sum()
-        )
-        rural_fraction_ct = 1 - urban_fraction[ct]
-        pop_ct_rural_b = asc_density_cumsum < rural_fraction_ct
-        pop_ct_urban_b = ~pop_ct_rural_b
-
-        pop_ct_rural_b[indicator_cells_ct == 0.0] = False
-        pop_ct_urban_b[indicator_cells_ct == 0.0] = False
-
-        pop_rural += pop_cells_ct.where(pop_ct_rural_b, 0.0)
-        pop_urban += pop_cells_ct.where(pop_ct_urban_b, 0.0)
+    pop_rural, pop_urban = split_urban_rural(
+        Iinv, nuts3, pop_cells, density_cells, urban_fraction
+    )
 
     pop_cells = {"total": pop_cells}
     pop_cells["rural"] = pop_rural
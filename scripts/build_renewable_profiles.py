@@ -90,19 +90,22 @@ adding up the installable potentials of the individual grid cells.
 
 import logging
 import time
-from itertools import product
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import shapely
 import xarray as xr
 from atlite.gis import ExclusionContainer
 from dask.distributed import Client
+from scipy import sparse
+from shapely.geometry import Polygon
 
 from scripts._helpers import (
     configure_logging,
     get_snapshots,
     load_cutout,
+    load_or_compute,
     set_scenario_config,
 )
 from scripts.build_shapes import _simplify_polys
@@ -110,6 +113,160 @@ from scripts.build_shapes import _simplify_polys
 logger = logging.getLogger(__name__)
 
 
+def build_class_regions(
+    class_masks: xr.DataArray,
+    grid: gpd.GeoDataFrame,
+    resource_regions: gpd.GeoSeries,
+    buses: pd.Index,
+) -> gpd.GeoSeries:
+    """
+    Build the region of each resource class of each bus.
+
+    All grid cells are labelled with their (bus, bin) class in one pass, cut
+    to the bus regions in one vectorised intersection and dissolved per class.
+
+    Parameters
+    ----------
+    class_masks : xr.DataArray
+        Boolean masks with dimensions ``bus``, ``bin``, ``y`` and ``x``.
+    grid : gpd.GeoDataFrame
+        Cutout grid cells with columns ``x`` and ``y``.
+    resource_regions : gpd.GeoSeries
+        Regions indexed by bus.
+    buses : pd.Index
+        Buses to build class regions for.
+
+    Returns
+    -------
+    gpd.GeoSeries
+        Class regions indexed by ``bus`` and ``bin``; empty for classes
+        without any grid cell.
+    """
+    masks = class_masks.sel(bus=buses).transpose("bus", "bin", "y", "x")
+    labels = pd.DataFrame(
+        {
+            dim: masks.coords[dim].values[i]
+            for dim, i in zip(masks.dims, np.nonzero(masks.values))
+        }
+    )
+
+    cells = grid.set_index(["y", "x"]).geometry
+    cells = cells.reindex(pd.MultiIndex.from_frame(labels[["y", "x"]])).values
+    regions = resource_regions.reindex(labels["bus"]).values
+    geometry = gpd.GeoSeries(cells, crs=grid.crs).intersection(
+        gpd.GeoSeries(regions, crs=grid.crs)
+    )
+
+    class_regions = (
+        gpd.GeoDataFrame(labels[["bus", "bin"]], geometry=geometry)
+        .dissolve(by=["bus", "bin"])
+        .geometry.buffer(0)
+    )
+    index = pd.MultiIndex.from_product(
+        [buses, class_masks.coords["bin"].values], names=["bus", "bin"]
+    )
+    return class_regions.reindex(index).fillna(Polygon())
+
+
+def cell_region_distances(
+    coords: gpd.GeoSeries,
+    regions: gpd.GeoSeries,
+    region_i: np.ndarray,
+    cell_i: np.ndarray,
+    cache_dir: str | None = None,
+) -> np.ndarray:
+    """
+    Distances in km between grid cells and regions for given index pairs.
+
+    The distances between all grid cells and all regions are computed once
+    and cached in ``cache_dir`` per combination of grid and regions, so that
+    other technologies with the same cutout and regions as well as reruns for
+    other weather years reuse them. The cached lookup holds one value per
+    region and grid cell.
+
+    Parameters
+    ----------
+    coords : gpd.GeoSeries
+        Representative points of the grid cells in a projected CRS.
+    regions : gpd.GeoSeries
+        Regions in the same CRS.
+    region_i, cell_i : np.ndarray
+        Positional indices of the region and grid cell of each pair.
+    cache_dir : str, optional
+        Directory of the distance cache.
+
+    Returns
+    -------
+    np.ndarray
+        Distance of each pair in km.
+    """
+
+    def compute():
+        cells = np.asarray(coords)[np.newaxis, :]
+        return shapely.distance(cells, np.asarray(regions)[:, np.newaxis]) / 1e3
+
+    distances = load_or_compute(
+        compute,
+        cache_dir,
+        key=[
+            "cell-region-distances-v3",
+            b"".join(shapely.to_wkb(coords.values)),
+            ",".join(regions.index),
+            b"".join(shapely.to_wkb(regions.values)),
+        ],
+        read=lambda fn: xr.load_dataarray(fn).values,
+        write=lambda distances, fn: xr.DataArray(
+            distances, dims=["region", "cell"], name="distance"
+        ).to_netcdf(fn),
+        suffix=".nc",
+    )
+    return distances[region_i, cell_i]
+
+
+def calculate_average_distance(
+    layoutmatrix: xr.DataArray,
+    coords: gpd.GeoSeries,
+    regions: gpd.GeoSeries,
+    cache_dir: str | None = None,
+) -> xr.DataArray:
+    """
+    Layout-weighted average distance of each resource class to its bus region.
+
+    Parameters
+    ----------
+    layoutmatrix : xr.DataArray
+        Layout weights with stacked dimensions ``bus_bin`` and ``spatial``.
+    coords : gpd.GeoSeries
+        Representative points of the grid cells, ordered like ``spatial``.
+    regions : gpd.GeoSeries
+        Bus regions (or points) in the same CRS, indexed by bus.
+    cache_dir : str, optional
+        Directory in which cell-to-region distances are cached.
+
+    Returns
+    -------
+    xr.DataArray
+        Average distance in km with dimensions ``bus`` and ``bin``.
+    """
+    bus_bins = layoutmatrix.indexes["bus_bin"]
+    weights = sparse.coo_matrix(
+        layoutmatrix.transpose("bus_bin", "spatial").fillna(0).values
+    )
+    region_i = regions.index.get_indexer(bus_bins.get_level_values("bus"))
+    if (region_i == -1).any():
+        missing = bus_bins.get_level_values("bus")[region_i == -1].unique()
+        raise ValueError(f"Buses {list(missing)} of the layout have no region.")
+    distances = cell_region_distances(
+        coords, regions, region_i[weights.row], weights.col, cache_dir
+    )
+
+    nrows = len(bus_bins)
+    total = np.bincount(weights.row, weights.data, minlength=nrows)
+    weighted = np.bincount(weights.row, weights.data * distances, minlength=nrows)
+    average_distance = np.divide(weighted, total, out=np.zeros(nrows), where=total != 0)
+    return xr.DataArray(average_distance, [bus_bins]).unstack("bus_bin")
+
+
 if __name__ == "__main__":
     if "snakemake" not in globals():
         from scripts._helpers import mock_snakemake
@@ -222,21 +379,9 @@ if __name__ == "__main__":
         )
         class_regions = resource_regions.set_axis(bus_bin_mi)
     else:
-        grid = cutout.grid.set_index(["y", "x"])
-        class_regions = {}
-        for bus, bin_id in product(buses, range(nbins)):
-            bus_bin_mask = (
-                class_masks.sel(bus=bus, bin=bin_id)
-                .stack(spatial=["y", "x"])
-                .to_pandas()
-            )
-            grid_cells = grid.loc[bus_bin_mask]
-            geometry = (
-                grid_cells.intersection(resource_regions.loc[bus]).union_all().buffer(0)
-            )
-            class_regions[(bus, bin_id)] = geometry
-        class_regions = gpd.GeoSeries(class_regions, crs=4326)
-        class_regions.index.names = ["bus", "bin"]
+        class_regions = build_class_regions(
+            class_masks, cutout.grid, resource_regions, buses
+        )
     class_regions.to_file(snakemake.output.class_regions)
 
     duration = time.time() - start
@@ -291,17 +436,9 @@ if __name__ == "__main__":
 
     coords = cutout.grid.representative_point().to_crs(3035)
 
-    average_distance = []
-    bus_bins = layoutmatrix.indexes["bus_bin"]
-    for bus, bin in bus_bins:
-        row = layoutmatrix.sel(bus=bus, bin=bin).data
-        nz_b = row != 0
-        row = row[nz_b]
-        co = coords[nz_b]
-        distances = co.distance(regions[bus]).div(1e3)  # km
-        average_distance.append((distances * (row / row.sum())).sum())
-
-    average_distance = xr.DataArray(average_distance, [bus_bins]).unstack("bus_bin")
+    average_distance = calculate_average_distance(
+        layoutmatrix, coords, regions, snakemake.params.get("distance_cache")
+    )
 
     ds = xr.merge(
         [
@@ -14,7 +14,6 @@ The rule is executed in ``build_sector.smk``.
 import logging
 
 import geopandas as gpd
-import numpy as np
 import xarray as xr
 from dask.distributed import Client, LocalCluster
 
@@ -22,6 +21,7 @@ from scripts._helpers import (
     configure_logging,
     get_snapshots,
     load_cutout,
+    population_weighted_matrix,
     set_scenario_config,
 )
 
@@ -54,16 +54,11 @@ if __name__ == "__main__":
 
     pop_layout = xr.open_dataarray(snakemake.input.pop_layout)
 
-    stacked_pop = pop_layout.stack(spatial=("y", "x"))
-    M = I.T.dot(np.diag(I.dot(stacked_pop)))
-
-    nonzero_sum = M.sum(axis=0, keepdims=True)
-    nonzero_sum[nonzero_sum == 0.0] = 1.0
-    M_tilde = M / nonzero_sum
+    M = population_weighted_matrix(I, pop_layout)
 
     solar_thermal = cutout.solar_thermal(
         **config,
-        matrix=M_tilde.T,
+        matrix=M,
         index=clustered_regions.index,
         dask_kwargs=dict(scheduler=client),
         show_progress=False,
@@ -25,7 +25,7 @@ from shapely.algorithms.polylabel import polylabel
 from shapely.geometry import LineString, MultiLineString, Point, Polygon
 from shapely.ops import linemerge, unary_union
 
-from scripts._helpers import configure_logging, set_scenario_config
+from scripts._helpers import configure_logging, load_or_compute, set_scenario_config
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +77,33 @@ def _create_polygon(row):
     return polygon
 
 
+def _strip_non_numeric(column, keep=";"):
+    """
+    Remove all characters from a string column except for digits and the
+    characters in ``keep``.
+    """
+    return column.str.replace(f"[^0-9{re.escape(keep)}]", "", regex=True)
+
+
+def _count_elements(column):
+    """
+    Count the number of semicolon separated elements in each cell of a string
+    column.
+    """
+    return column.str.count(";") + 1
+
+
+def _select_element(column, position):
+    """
+    Select the element at 1-based ``position`` from semicolon separated cells.
+    """
+    return pd.Series(
+        [x.split(";")[i - 1] for x, i in zip(column, position)],
+        index=column.index,
+        dtype=object,
+    )
+
+
 def _clean_voltage(column):
     """
     Function to clean the raw voltage column: manual fixing and drop nan values
@@ -124,7 +151,7 @@ def _clean_voltage(column):
     )
 
     # Remove all remaining non-numeric characters except for semicolons
-    column = column.apply(lambda x: re.sub(r"[^0-9;]", "", str(x)))
+    column = _strip_non_numeric(column)
 
     column.dropna(inplace=True)
     return column
@@ -155,7 +182,7 @@ def _clean_circuits(column):
     )
 
     # Remove all remaining non-numeric characters except for semicolons
-    column = column.apply(lambda x: re.sub(r"[^0-9;]", "", x))
+    column = _strip_non_numeric(column)
 
     column.dropna(inplace=True)
     return column.astype(str)
@@ -183,7 +210,7 @@ def _clean_cables(column):
     )
 
     # Remove all remaining non-numeric characters except for semicolons
-    column = column.apply(lambda x: re.sub(r"[^0-9;]", "", x))
+    column = _strip_non_numeric(column)
 
     column.dropna(inplace=True)
     return column.astype(str)
@@ -221,31 +248,34 @@ def _clean_wires(column):
     )
 
     # Remove all remaining non-numeric characters except for semicolons
-    column = column.apply(lambda x: re.sub(r"[^0-9;]", "", x))
+    column = _strip_non_numeric(column)
 
     column.dropna(inplace=True)
     return column.astype(str)
 
 
-def _check_voltage(voltage, list_voltages):
+def _has_voltage(column, list_voltages):
     """
-    Check if the given voltage is present in the list of allowed voltages.
+    Check for each cell of semicolon separated voltages whether any of them
+    is present in the list of allowed voltages.
 
     Parameters
     ----------
-    voltage (str): The voltage to check.
+    column (pd.Series): The semicolon separated voltages to check.
     list_voltages (list): A list of allowed voltages.
 
     Returns
     -------
-    bool: True if the voltage is present in the list of allowed voltages,
-    False otherwise.
+    pd.Series: True where at least one voltage is present in the list of
+    allowed voltages, False otherwise.
     """
-    voltages = voltage.split(";")
-    for v in voltages:
-        if v in list_voltages:
-            return True
-    return False
+    elements = column.str.split(";")
+    rows = np.repeat(np.arange(len(elements)), elements.str.len())
+    matches = elements.explode().isin(list_voltages).to_numpy()
+    return pd.Series(
+        np.bincount(rows, weights=matches, minlength=len(column)) > 0,
+        index=column.index,
+    )
 
 
 def _clean_frequency(column):
@@ -274,7 +304,7 @@ def _clean_frequency(column):
     )
 
     # Remove all remaining non-numeric characters except for semicolons
-    column = column.apply(lambda x: re.sub(r"[^0-9;.]", "", x))
+    column = _strip_non_numeric(column, keep=";.")
 
     column.dropna(inplace=True)
     return column.astype(str)
@@ -295,10 +325,16 @@ def _clean_rating(column):
     column = column.astype(str).str.replace("MW", "")
 
     # Remove all remaining non-numeric characters except for semicolons
-    column = column.apply(lambda x: re.sub(r"[^0-9;]", "", x))
+    column = _strip_non_numeric(column)
 
     # Sum up all ratings if there are multiple entries
-    column = column.str.split(";").apply(lambda x: sum([int(i) for i in x]))
+    elements = column.str.split(";")
+    rows = np.repeat(np.arange(len(elements)), elements.str.len())
+    ratings = elements.explode().astype(int).to_numpy()
+    column = pd.Series(
+        np.bincount(rows, weights=ratings, minlength=len(column)).astype(int),
+        index=column.index,
+    )
 
     column.dropna(inplace=True)
     return column.astype(str)
@@ -328,66 +364,103 @@ def _split_cells(df, cols=["voltage"]):
     if df.empty:
         return df
 
-    # Create a dictionary to store the suffix count for each original ID
-    suffix_counts = {}
-    # Create a dictionary to store the number of splits associated with each
-    # original ID
-    num_splits = {}
-
     # Split cells and create new rows
     x = df.assign(**{col: df[col].str.split(";") for col in cols})
     x = x.explode(cols, ignore_index=True)
 
     # Count the number of splits associated with each original ID
-    num_splits = x.groupby("id").size().to_dict()
+    grouped = x.groupby("id")
+    x["split_elements"] = grouped["id"].transform("size")
 
-    # Update the 'split_elements' column
-    x["split_elements"] = x["id"].map(num_splits)
-
-    # Function to generate the new ID with suffix and update the number of
-    # splits
-    def generate_new_id(row):
-        original_id = row["id"]
-        if row["split_elements"] == 1:
-            return original_id
-        else:
-            suffix_counts[original_id] = suffix_counts.get(original_id, 0) + 1
-            return f"{original_id}-{suffix_counts[original_id]}"
-
-    # Update the ID column with the new IDs
-    x["id"] = x.apply(generate_new_id, axis=1)
+    # Add a running suffix to the IDs of split elements
+    suffix = (grouped.cumcount() + 1).astype(str)
+    x["id"] = x["id"].where(x["split_elements"] == 1, x["id"] + "-" + suffix)
 
     return x
 
 
-def _distribute_to_circuits(row):
+def _distribute_to_circuits(df):
     """
     Distributes the number of circuits or cables to individual circuits based
-    on the given row data.
+    on the given data.
 
     Parameters
     ----------
-    - row: A dictionary representing a row of data containing information about
-      circuits and cables.
+    - df: A DataFrame containing information about circuits, cables and the
+      number of split elements per row.
 
     Returns
     -------
     - single_circuit: The number of circuits to be assigned to each individual
       circuit.
     """
-    if row["circuits"] != "":
-        circuits = int(row["circuits"])
-    else:
-        cables = int(row["cables"])
-        circuits = cables / 3
+    has_circuits = df["circuits"] != ""
+    circuits = pd.Series(np.nan, index=df.index)
+    circuits[has_circuits] = df.loc[has_circuits, "circuits"].astype(int)
+    circuits[~has_circuits] = df.loc[~has_circuits, "cables"].astype(int) / 3
 
-    single_circuit = int(max(1, np.floor_divide(circuits, row["split_elements"])))
-    single_circuit = str(single_circuit)
+    single_circuit = np.floor_divide(circuits, df["split_elements"]).clip(lower=1)
+    single_circuit = single_circuit.astype(int).astype(str)
 
     return single_circuit
 
 
-def _import_lines_and_cables(path_lines):
+def _read_osm_elements(path, col_tags, cache_dir=None):
+    """
+    Read the elements of an Overpass JSON file into a DataFrame.
+
+    Only the tags in ``col_tags`` are extracted as columns, instead of
+    normalising all tags of all elements. Tags which are missing for all
+    elements are filled with ``pd.NA``.
+
+    Parsing the per-country extracts takes most of the import time, so the
+    parsed elements are cached in ``cache_dir`` by the hash of the file
+    content and the extracted tags. Only extracts of countries whose OSM data
+    changed are parsed again. The cleaning itself and
+    :mod:`build_osm_network` still process all countries together, as
+    relations, substations and lines are merged across borders.
+
+    Parameters
+    ----------
+    - path (str): Path to the Overpass JSON file.
+    - col_tags (list): Tags to extract as columns.
+    - cache_dir (str, optional): Directory of the parsed elements cache.
+
+    Returns
+    -------
+    - df (DataFrame): A DataFrame with one row per element, its attributes
+      except ``type`` and ``tags``, and one column per tag as string.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+
+    def parse():
+        elements = json.loads(content)["elements"]
+
+        df = pd.DataFrame(elements).drop(columns=["type", "tags"], errors="ignore")
+        df["id"] = df["id"].astype(str)
+
+        tags = {}
+        for ct in col_tags:
+            values = [e.get("tags", {}).get(ct) for e in elements]
+            if all(v is None for v in values):
+                tags[ct] = pd.NA
+            else:
+                tags[ct] = [np.nan if v is None else str(v) for v in values]
+        tags = pd.DataFrame(tags, index=df.index)
+        return pd.concat([df, tags], axis="columns")
+
+    return load_or_compute(
+        parse,
+        cache_dir,
+        key=["osm-elements-v1", content, ";".join(col_tags)],
+        read=pd.read_pickle,
+        write=lambda df, fn: df.to_pickle(fn),
+        suffix=".pkl",
+    )
+
+
+def _import_lines_and_cables(path_lines, cache_dir=None):
     """
     Import lines and cables from the given input paths.
 
@@ -395,6 +468,8 @@ def _import_lines_and_cables(path_lines):
     ----------
     - path_lines (dict): A dictionary containing the input paths for lines and
       cables data.
+    - cache_dir (str, optional): Directory of the parsed elements cache, see
+      :func:`_read_osm_elements`.
 
     Returns
     -------
@@ -414,7 +489,15 @@ def _import_lines_and_cables(path_lines):
         "voltage",
         "wires",
     ]
-    df_lines = pd.DataFrame(columns=columns)
+    col_tags = [
+        "power",
+        "cables",
+        "circuits",
+        "frequency",
+        "voltage",
+        "wires",
+    ]
+    dfs = [pd.DataFrame(columns=columns)]
 
     logger.info("Importing lines and cables")
     for key in path_lines:
@@ -428,36 +511,10 @@ def _import_lines_and_cables(path_lines):
                 logger.info(
                     f" - Importing {key} {str(idx + 1).zfill(2)}/{str(len(path_lines[key])).zfill(2)}: {ip}"
                 )
-                with open(ip) as f:
-                    data = json.load(f)
-
-                df = pd.DataFrame(data["elements"])
-                df["id"] = df["id"].astype(str)
-                df["country"] = country
-
-                col_tags = [
-                    "power",
-                    "cables",
-                    "circuits",
-                    "frequency",
-                    "voltage",
-                    "wires",
-                ]
-
-                tags = pd.json_normalize(df["tags"]).map(
-                    lambda x: str(x) if pd.notnull(x) else x
-                )
-
-                for ct in col_tags:
-                    if ct not in tags.columns:
-                        tags[ct] = pd.NA
-
-                tags = tags.loc[:, col_tags]
-
-                df = pd.concat([df, tags], axis="columns")
-                df.drop(columns=["type", "tags"], inplace=True)
+                df = _read_osm_elements(ip, col_tags, cache_dir)
+                df.insert(df.columns.get_loc(col_tags[0]), "country", country)
 
-                df_lines = pd.concat([df_lines, df], axis="rows")
+                dfs.append(df)
 
             else:
                 logger.info(
@@ -466,13 +523,15 @@ def _import_lines_and_cables(path_lines):
                 continue
         logger.info("---")
 
+    df_lines = pd.concat(dfs, axis="rows")
+
     # Append prefix "way/"
     df_lines["id"] = "way/" + df_lines["id"]
 
     return df_lines
 
 
-def _import_routes_relation(path_relation):
+def _import_routes_relation(path_relation, cache_dir=None):
     columns = [
         "id",
         "bounds",
@@ -484,7 +543,14 @@ def _import_routes_relation(path_relation):
         "frequency",
         "voltage",
     ]
-    df_relation = pd.DataFrame(columns=columns)
+    col_tags = [
+        "circuits",
+        "cables",
+        "frequency",
+        "voltage",
+        "rating",
+    ]
+    dfs = [pd.DataFrame(columns=columns)]
 
     logger.info("Importing power route relations (lines, cables, links)")
     for key in path_relation:
@@ -498,36 +564,11 @@ def _import_routes_relation(path_relation):
                 logger.info(
                     f" - Importing {key} {str(idx + 1).zfill(2)}/{str(len(path_relation[key])).zfill(2)}: {ip}"
                 )
-                with open(ip) as f:
-                    data = json.load(f)
-
-                df = pd.DataFrame(data["elements"])
-                df["id"] = df["id"].astype(str)
-                df["id"] = df["id"].apply(lambda x: (f"relation/{x}"))
-                df["country"] = country
-
-                col_tags = [
-                    "circuits",
-                    "cables",
-                    "frequency",
-                    "voltage",
-                    "rating",
-                ]
-
-                tags = pd.json_normalize(df["tags"]).map(
-                    lambda x: str(x) if pd.notnull(x) else x
-                )
-
-                for ct in col_tags:
-                    if ct not in tags.columns:
-                        tags[ct] = pd.NA
-
-                tags = tags.loc[:, col_tags]
-
-                df = pd.concat([df, tags], axis="columns")
-                df.drop(columns=["type", "tags"], inplace=True)
+                df = _read_osm_elements(ip, col_tags, cache_dir)
+                df["id"] = "relation/" + df["id"]
+                df.insert(df.columns.get_loc(col_tags[0]), "country", country)
 
-                df_relation = pd.concat([df_relation, df], axis="rows")
+                dfs.append(df)
 
             else:
                 logger.info(
@@ -535,6 +576,8 @@ def _import_routes_relation(path_relation):
                 )
                 continue
 
+    df_relation = pd.concat(dfs, axis="rows")
+
     return df_relation
 
 
@@ -703,7 +746,7 @@ def _filter_by_voltage(df, min_voltage=220000):
     list_voltages = list_voltages[list_voltages >= int(min_voltage)]
     list_voltages = list_voltages.astype(str)
 
-    bool_voltages = df["voltage"].apply(_check_voltage, list_voltages=list_voltages)
+    bool_voltages = _has_voltage(df["voltage"], list_voltages)
     len_before = len(df)
     df = df[bool_voltages]
     len_after = len(df)
@@ -740,31 +783,26 @@ def _clean_substations(df_substations, list_voltages):
 
     df_substations = _split_cells(df_substations)
 
-    bool_voltages = df_substations["voltage"].apply(
-        _check_voltage, list_voltages=list_voltages
-    )
+    bool_voltages = _has_voltage(df_substations["voltage"], list_voltages)
     df_substations = df_substations[bool_voltages]
-    df_substations.loc[:, "split_count"] = df_substations["id"].apply(
-        lambda x: x.split("-")[1] if "-" in x else "0"
+    df_substations.loc[:, "split_count"] = (
+        df_substations["id"].str.split("-").str[1].fillna("0")
     )
     df_substations.loc[:, "split_count"] = df_substations["split_count"].astype(int)
 
     bool_split = df_substations["split_elements"] > 1
     bool_frequency_len = (
-        df_substations["frequency"].apply(lambda x: len(x.split(";")))
-        == df_substations["split_elements"]
+        _count_elements(df_substations["frequency"]) == df_substations["split_elements"]
     )
 
-    df_substations.loc[bool_frequency_len & bool_split, "frequency"] = (
-        df_substations.loc[bool_frequency_len & bool_split,].apply(
-            lambda row: row["frequency"].split(";")[row["split_count"] - 1], axis=1
-        )
+    bool_select = bool_frequency_len & bool_split
+    df_substations.loc[bool_select, "frequency"] = _select_element(
+        df_substations.loc[bool_select, "frequency"],
+        df_substations.loc[bool_select, "split_count"],
     )
 
     df_substations = _split_cells(df_substations, cols=["frequency"])
-    bool_invalid_frequency = df_substations["frequency"].apply(
-        lambda x: x not in ["50", "0"]
-    )
+    bool_invalid_frequency = ~df_substations["frequency"].isin(["50", "0"])
     df_substations.loc[bool_invalid_frequency, "frequency"] = "50"
 
     return df_substations
@@ -817,17 +855,13 @@ def _clean_lines(df_lines, list_voltages):
     df_lines["circuits_original"] = df_lines["circuits"]
 
     df_lines = _split_cells(df_lines)
-    bool_voltages = df_lines["voltage"].apply(
-        _check_voltage, list_voltages=list_voltages
-    )
+    bool_voltages = _has_voltage(df_lines["voltage"], list_voltages)
     df_lines = df_lines[bool_voltages]
 
     bool_ac = df_lines["frequency"] != "0"
     bool_dc = ~bool_ac
     valid_frequency = ["50", "0"]
-    bool_invalid_frequency = df_lines["frequency"].apply(
-        lambda x: x not in valid_frequency
-    )
+    bool_invalid_frequency = ~df_lines["frequency"].isin(valid_frequency)
 
     bool_noinfo = (df_lines["cables"] == "") & (df_lines["circuits"] == "")
     # Fill in all values where cables info and circuits does not exist. Assuming 1 circuit
@@ -840,15 +874,19 @@ def _clean_lines(df_lines, list_voltages):
         (df_lines["cables"] != "")
         & (df_lines["split_elements"] == 1)
         & (df_lines["cables"] != "0")
-        & (df_lines["cables"].apply(lambda x: len(x.split(";")) == 1))
+        & (_count_elements(df_lines["cables"]) == 1)
         & (df_lines["circuits"] == "")
         & (df_lines["cleaned"] == False)
         & bool_ac
     )
 
-    df_lines.loc[bool_cables_ac, "circuits"] = df_lines.loc[
-        bool_cables_ac, "cables"
-    ].apply(lambda x: str(int(max(1, np.floor_divide(int(x), 3)))))
+    df_lines.loc[bool_cables_ac, "circuits"] = (
+        df_lines.loc[bool_cables_ac, "cables"]
+        .astype(int)
+        .floordiv(3)
+        .clip(lower=1)
+        .astype(str)
+    )
 
     df_lines.loc[bool_cables_ac, "frequency"] = "50"
     df_lines.loc[bool_cables_ac, "cleaned"] = True
@@ -857,15 +895,19 @@ def _clean_lines(df_lines, list_voltages):
         (df_lines["cables"] != "")
         & (df_lines["split_elements"] == 1)
         & (df_lines["cables"] != "0")
-        & (df_lines["cables"].apply(lambda x: len(x.split(";")) == 1))
+        & (_count_elements(df_lines["cables"]) == 1)
         & (df_lines["circuits"] == "")
         & (df_lines["cleaned"] == False)
         & bool_dc
     )
 
-    df_lines.loc[bool_cables_dc, "circuits"] = df_lines.loc[
-        bool_cables_dc, "cables"
-    ].apply(lambda x: str(int(max(1, np.floor_divide(int(x), 2)))))
+    df_lines.loc[bool_cables_dc, "circuits"] = (
+        df_lines.loc[bool_cables_dc, "cables"]
+        .astype(int)
+        .floordiv(2)
+        .clip(lower=1)
+        .astype(str)
+    )
 
     df_lines.loc[bool_cables_dc, "frequency"] = "0"
     df_lines.loc[bool_cables_dc, "cleaned"] = True
@@ -875,7 +917,7 @@ def _clean_lines(df_lines, list_voltages):
         (df_lines["circuits"] != "")
         & (df_lines["split_elements"] == 1)
         & (df_lines["circuits"] != "0")
-        & (df_lines["circuits"].apply(lambda x: len(x.split(";")) == 1))
+        & (_count_elements(df_lines["circuits"]) == 1)
         & (df_lines["cleaned"] == False)
     )
 
@@ -886,14 +928,14 @@ def _clean_lines(df_lines, list_voltages):
     # Clean those values where number of voltages split by semicolon is larger
     # than no cables or no circuits
     bool_cables = (
-        (df_lines["voltage_original"].apply(lambda x: len(x.split(";")) > 1))
-        & (df_lines["cables"].apply(lambda x: len(x.split(";")) == 1))
-        & (df_lines["circuits"].apply(lambda x: len(x.split(";")) == 1))
+        (_count_elements(df_lines["voltage_original"]) > 1)
+        & (_count_elements(df_lines["cables"]) == 1)
+        & (_count_elements(df_lines["circuits"]) == 1)
         & (df_lines["cleaned"] == False)
     )
 
-    df_lines.loc[bool_cables, "circuits"] = df_lines[bool_cables].apply(
-        _distribute_to_circuits, axis=1
+    df_lines.loc[bool_cables, "circuits"] = _distribute_to_circuits(
+        df_lines[bool_cables]
     )
     df_lines.loc[bool_cables & bool_ac, "frequency"] = "50"
     df_lines.loc[bool_cables & bool_dc, "frequency"] = "0"
@@ -901,17 +943,15 @@ def _clean_lines(df_lines, list_voltages):
 
     # Clean those values where multiple circuit values are present, divided by
     # semicolon
-    has_multiple_circuits = df_lines["circuits"].apply(lambda x: len(x.split(";")) > 1)
-    circuits_match_split_elements = df_lines.apply(
-        lambda row: len(row["circuits"].split(";")) == row["split_elements"],
-        axis=1,
-    )
+    n_circuits = _count_elements(df_lines["circuits"])
+    has_multiple_circuits = n_circuits > 1
+    circuits_match_split_elements = n_circuits == df_lines["split_elements"]
     is_not_cleaned = df_lines["cleaned"] == False
     bool_cables = has_multiple_circuits & circuits_match_split_elements & is_not_cleaned
 
-    df_lines.loc[bool_cables, "circuits"] = df_lines.loc[bool_cables].apply(
-        lambda row: str(row["circuits"].split(";")[int(row["id"].split("-")[-1]) - 1]),
-        axis=1,
+    split_count = df_lines.loc[bool_cables, "id"].str.split("-").str[-1].astype(int)
+    df_lines.loc[bool_cables, "circuits"] = _select_element(
+        df_lines.loc[bool_cables, "circuits"], split_count
     )
 
     df_lines.loc[bool_cables & bool_ac, "frequency"] = "50"
@@ -920,24 +960,16 @@ def _clean_lines(df_lines, list_voltages):
 
     # Clean those values where multiple cables values are present, divided by
     # semicolon
-    has_multiple_cables = df_lines["cables"].apply(lambda x: len(x.split(";")) > 1)
-    cables_match_split_elements = df_lines.apply(
-        lambda row: len(row["cables"].split(";")) == row["split_elements"],
-        axis=1,
-    )
+    n_cables = _count_elements(df_lines["cables"])
+    has_multiple_cables = n_cables > 1
+    cables_match_split_elements = n_cables == df_lines["split_elements"]
     is_not_cleaned = df_lines["cleaned"] == False
     bool_cables = has_multiple_cables & cables_match_split_elements & is_not_cleaned
 
-    df_lines.loc[bool_cables, "circuits"] = df_lines.loc[bool_cables].apply(
-        lambda row: str(
-            max(
-                1,
-                np.floor_divide(
-                    int(row["cables"].split(";")[int(row["id"].split("-")[-1]) - 1]), 3
-                ),
-            )
-        ),
-        axis=1,
+    split_count = df_lines.loc[bool_cables, "id"].str.split("-").str[-1].astype(int)
+    cables = _select_element(df_lines.loc[bool_cables, "cables"], split_count)
+    df_lines.loc[bool_cables, "circuits"] = (
+        cables.astype(int).floordiv(3).clip(lower=1).astype(str)
     )
 
     df_lines.loc[bool_cables & bool_ac, "frequency"] = "50"
@@ -1219,7 +1251,7 @@ def _finalise_links(df_links):
     return df_links
 
 
-def _import_substations(path_substations):
+def _import_substations(path_substations, cache_dir=None):
     """
     Import substations from the given input paths. This function imports both
     substations from OSM ways as well as relations that contain nested
@@ -1230,6 +1262,8 @@ def _import_substations(path_substations):
     Args:
         path_substations (dict): A dictionary containing input paths for
         substations.
+        cache_dir (str, optional): Directory of the parsed elements cache, see
+        :func:`_read_osm_elements`.
 
     Returns:
         pd.DataFrame: A DataFrame containing the imported substations data.
@@ -1251,8 +1285,11 @@ def _import_substations(path_substations):
         "voltage",
         "frequency",
     ]
-    df_substations_way = pd.DataFrame(columns=cols_substations_way)
-    df_substations_relation = pd.DataFrame(columns=cols_substations_relation)
+    col_tags = ["power", "substation", "voltage", "frequency"]
+    dfs = {
+        "substations_way": [pd.DataFrame(columns=cols_substations_way)],
+        "substations_relation": [pd.DataFrame(columns=cols_substations_relation)],
+    }
 
     logger.info("Importing substations")
     for key in path_substations:
@@ -1265,43 +1302,17 @@ def _import_substations(path_substations):
                 logger.info(
                     f" - Importing {key} {str(idx + 1).zfill(2)}/{str(len(path_substations[key])).zfill(2)}: {ip}"
                 )
-                with open(ip) as f:
-                    data = json.load(f)
-
-                df = pd.DataFrame(data["elements"])
-                df["id"] = df["id"].astype(str)
+                df = _read_osm_elements(ip, col_tags, cache_dir)
                 # new string that adds "way/" to id
-                df["id"] = df["id"].apply(
-                    lambda x: (
-                        f"way/{x}" if key == "substations_way" else f"relation/{x}"
-                    )
-                )
-                df["country"] = country
-
-                col_tags = ["power", "substation", "voltage", "frequency"]
-
-                tags = pd.json_normalize(df["tags"]).map(
-                    lambda x: str(x) if pd.notnull(x) else x
-                )
-
-                for ct in col_tags:
-                    if ct not in tags.columns:
-                        tags[ct] = pd.NA
-
-                tags = tags.loc[:, col_tags]
-
-                df = pd.concat([df, tags], axis="columns")
+                prefix = "way/" if key == "substations_way" else "relation/"
+                df["id"] = prefix + df["id"]
+                df.insert(df.columns.get_loc(col_tags[0]), "country", country)
 
                 if key == "substations_way":
-                    df.drop(columns=["type", "tags", "bounds", "nodes"], inplace=True)
-                    df_substations_way = pd.concat(
-                        [df_substations_way, df], axis="rows"
-                    )
+                    df.drop(columns=["bounds", "nodes"], inplace=True)
                 elif key == "substations_relation":
-                    df.drop(columns=["type", "tags", "bounds"], inplace=True)
-                    df_substations_relation = pd.concat(
-                        [df_substations_relation, df], axis="rows"
-                    )
+                    df.drop(columns=["bounds"], inplace=True)
+                dfs[key].append(df)
 
             else:
                 logger.info(
@@ -1310,6 +1321,9 @@ def _import_substations(path_substations):
                 continue
         logger.info("---")
 
+    df_substations_way = pd.concat(dfs["substations_way"], axis="rows")
+    df_substations_relation = pd.concat(dfs["substations_relation"], axis="rows")
+
     df_substations_way.drop_duplicates(subset="id", keep="first", inplace=True)
     df_substations_relation.drop_duplicates(subset="id", keep="first", inplace=True)
 
@@ -1317,7 +1331,7 @@ def _import_substations(path_substations):
 
     # Normalise the members column of df_substations_relation
     cols_members = ["id", "type", "ref", "role", "geometry"]
-    df_substations_relation_members = pd.DataFrame(columns=cols_members)
+    members = [pd.DataFrame(columns=cols_members)]
 
     for index, row in df_substations_relation.iterrows():
         col_members = ["type", "ref", "role", "geometry"]
@@ -1333,10 +1347,9 @@ def _import_substations(path_substations):
         df = df[df["type"] != "node"]
         df = df.dropna(subset=["geometry"])
         df = df[~df["role"].isin(["", "incoming_line", "substation", "inner"])]
-        df_substations_relation_members = pd.concat(
-            [df_substations_relation_members, df], axis="rows"
-        )
+        members.append(df)
 
+    df_substations_relation_members = pd.concat(members, axis="rows")
     df_substations_relation_members.reset_index(inplace=True)
     df_substations_relation_members["linestring"] = (
         df_substations_relation_members.apply(_create_linestring, axis=1)
@@ -1594,6 +1607,7 @@ if __name__ == "__main__":
     crs = "EPSG:4326"  # Correct crs for OSM data
     min_voltage_ac = 60000  # [unit: V] Minimum voltage value to filter AC lines.
     min_voltage_dc = 150000  #  [unit: V] Minimum voltage value to filter DC links.
+    cache_dir = snakemake.params.get("elements_cache")
 
     logger.info("---")
     logger.info("SUBSTATIONS")
@@ -1604,7 +1618,7 @@ if __name__ == "__main__":
     }
 
     # Cleaning process
-    df_substations = _import_substations(path_substations)
+    df_substations = _import_substations(path_substations, cache_dir)
     df_substations["voltage"] = _clean_voltage(df_substations["voltage"])
 
     # Extract converter subset
@@ -1655,7 +1669,7 @@ if __name__ == "__main__":
         "routes_relation": snakemake.input.routes_relation,
     }
 
-    df_routes_relation = _import_routes_relation(path_routes_relation)
+    df_routes_relation = _import_routes_relation(path_routes_relation, cache_dir)
 
     df_lines_cables_relation = df_routes_relation.copy()
     df_lines_cables_relation = _drop_duplicate_lines(df_lines_cables_relation)
@@ -1746,7 +1760,7 @@ if __name__ == "__main__":
     }
 
     # Import and replace with relations, if relations unique linestrings and line is a member
-    df_lines = _import_lines_and_cables(path_lines)
+    df_lines = _import_lines_and_cables(path_lines, cache_dir)
     df_lines = _drop_duplicate_lines(df_lines)
 
     # Dropping
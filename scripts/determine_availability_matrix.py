@@ -47,57 +47,274 @@ Inputs
   :ref:`busregions`
 - ``"cutouts/" + params["renewable"][{technology}]['cutout']``: :ref:`cutout`
 - ``networks/_base_s_{clusters}.nc``: :ref:`base`
+- ``resources/availability_matrix_base_s_{technology}.nc``: (if
+  ``atlite: availability_from_base_regions:`` is enabled) availability matrix
+  of the unclustered regions, which is aggregated to the clustered regions
+  using ``resources/busmap_base_s_{clusters}.csv`` instead of repeating the
+  land eligibility analysis for every number of clusters.
 
 Outputs
 -------
 
 - ``resources/availability_matrix_{clusters_{technology}.nc``
+- ``resources/availability_matrix_base_s_{technology}.nc``
 """
 
 import functools
+import importlib
 import logging
+import multiprocessing as mp
 import time
+import warnings
 
 import atlite
 import geopandas as gpd
 import numpy as np
+import pandas as pd
+import rasterio
+import rasterio.features
+import rasterio.warp
+import shapely
 import xarray as xr
+from tqdm import tqdm
 
 from scripts._helpers import configure_logging, load_cutout, set_scenario_config
 
 logger = logging.getLogger(__name__)
 
 
-if __name__ == "__main__":
-    if "snakemake" not in globals():
-        from scripts._helpers import mock_snakemake
+def aggregate_availability_matrix(availability, busmap, buses):
+    """
+    Aggregate the availability matrix of base regions to clustered regions.
+
+    Since clustered regions are dissolved from the base regions, the eligible
+    share of each grid cell in a clustered region is the sum of the shares in
+    its base regions.
+
+    Parameters
+    ----------
+    availability : xr.DataArray
+        Availability matrix with dimensions (bus, y, x) for the base regions.
+    busmap : pd.Series
+        Mapping from base buses to clustered buses.
+    buses : pd.Index
+        Clustered buses to return, in order.
+
+    Returns
+    -------
+    xr.DataArray
+        Availability matrix with dimensions (bus, y, x) for the clustered regions.
+    """
+    busmap = busmap.reindex(availability.indexes["bus"])
+    availability = availability.sel(bus=busmap.dropna().index)
+    groups = xr.DataArray(busmap.dropna().values, dims="bus", name="bus")
+    aggregated = availability.groupby(groups).sum()
+    return aggregated.reindex(bus=buses, fill_value=0.0).transpose(
+        "bus", *availability.dims[1:]
+    )
 
-        snakemake = mock_snakemake(
-            "build_renewable_profiles", clusters=100, technology="onwind"
+
+def tile_regions(regions, tile_size, crs):
+    """
+    Split regions into pieces along a square grid of tiles.
+
+    Parameters
+    ----------
+    regions : gpd.GeoSeries
+        Region geometries indexed by bus.
+    tile_size : float
+        Edge length of the tiles in km.
+    crs : int or str
+        Projected coordinate reference system in metres, the one of the excluder.
+
+    Returns
+    -------
+    gpd.GeoSeries
+        Non-empty intersections of regions and tiles, indexed by bus.
+    """
+    regions = regions.to_crs(crs)
+    step = tile_size * 1e3
+    xmin, ymin, xmax, ymax = regions.total_bounds
+    x, y = np.meshgrid(
+        np.arange(np.floor(xmin / step) * step, xmax, step),
+        np.arange(np.floor(ymin / step) * step, ymax, step),
+    )
+    grid = shapely.box(x.ravel(), y.ravel(), x.ravel() + step, y.ravel() + step)
+
+    region_i, tile_i = shapely.STRtree(grid).query(
+        regions.values, predicate="intersects"
+    )
+    pieces = shapely.intersection(regions.values[region_i], grid[tile_i])
+    tiles = gpd.GeoSeries(pieces, index=regions.index[region_i], crs=regions.crs)
+    return tiles[tiles.area > 0]
+
+
+_tile_worker_args = None
+
+
+def _init_tile_worker(*args):
+    global _tile_worker_args
+    _tile_worker_args = args
+
+
+def _tile_availability(piece, window, excluder=None, *dst):
+    """
+    Eligible share of the cutout cells in ``piece``.
+
+    The exclusions are evaluated in the raster window spanned by
+    ``window``, so that buffers around excluded pixels reach into ``piece``
+    from outside of it, but only pixels within ``piece`` are counted.
+    """
+    if excluder is None:
+        excluder, *dst = _tile_worker_args
+    dst_transform, dst_crs, dst_shape = dst
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        window = gpd.GeoSeries([window], crs=excluder.crs)
+        masked, transform = atlite.gis.shape_availability(window, excluder)
+        masked &= rasterio.features.geometry_mask(
+            [piece], masked.shape, transform, invert=True
         )
-    configure_logging(snakemake)
-    set_scenario_config(snakemake)
+        masked, transform = atlite.gis.pad_extent(
+            masked, transform, dst_transform, excluder.crs, dst_crs
+        )
+        return rasterio.warp.reproject(
+            masked.astype(np.uint8),
+            np.empty(dst_shape),
+            resampling=rasterio.warp.Resampling.average,
+            src_transform=transform,
+            dst_transform=dst_transform,
+            src_crs=excluder.crs,
+            dst_crs=dst_crs,
+        )[0]
+
+
+def tiled_availabilitymatrix(
+    cutout,
+    regions,
+    excluder,
+    tile_size,
+    nprocesses=None,
+    max_memory=None,
+    disable_progressbar=True,
+):
+    """
+    Compute the availability matrix tile by tile to bound the memory usage.
+
+    The exclusion rasters are only read in windows around each tile, instead
+    of around whole regions, which at high ``excluder_resolution`` can take
+    several GB each. The windows are padded by the largest raster buffer and
+    clipped to the bounds of the region, so that each pixel sees the same
+    exclusions as in :meth:`atlite.Cutout.availabilitymatrix` on whole
+    regions. As the tiles of a region are disjoint, its availability is the
+    sum of the availability of its tiles.
+
+    The number of processes is reduced if the estimated memory of all
+    workers exceeds ``max_memory``. The estimate is a heuristic: a base
+    overhead of 500 MB per worker plus one float64 array per exclusion layer
+    of the excluder on the padded window.
+
+    Parameters
+    ----------
+    cutout : atlite.Cutout
+    regions : gpd.GeoDataFrame
+        Regions indexed by bus.
+    excluder : atlite.ExclusionContainer
+    tile_size : float
+        Edge length of the tiles in km.
+    nprocesses : int, optional
+        Number of worker processes.
+    max_memory : float, optional
+        Memory ceiling for all workers in MB.
+    disable_progressbar : bool, optional
+        Whether to hide the progress bar.
+
+    Returns
+    -------
+    xr.DataArray
+        Availability matrix with dimensions (bus, y, x).
+    """
+    regions = regions.geometry.to_crs(excluder.crs)
+    tiles = tile_regions(regions, tile_size, excluder.crs)
+    logger.info(f"Split {len(regions)} regions into {len(tiles)} tiles.")
+
+    res = excluder.res
+    pad = max(
+        [(d["buffer"] // res + 2) * res for d in excluder.rasters if d["buffer"]],
+        default=0,
+    )
+    region_bounds = regions.bounds.loc[tiles.index].values
+    tile_bounds = tiles.bounds.values + [-pad, -pad, pad, pad]
+    windows = shapely.box(
+        *np.maximum(tile_bounds[:, :2], region_bounds[:, :2]).T,
+        *np.minimum(tile_bounds[:, 2:], region_bounds[:, 2:]).T,
+    )
 
-    nprocesses = int(snakemake.threads)
-    noprogress = snakemake.config["run"].get("disable_progressbar", True)
-    noprogress = noprogress or not snakemake.config["atlite"]["show_progress"]
-    technology = snakemake.wildcards.technology
-    params = snakemake.params.renewable[technology]
+    if nprocesses and max_memory:
+        layers = len(excluder.rasters) + len(excluder.geometries) + 1
+        pixels = ((tile_size * 1e3 + 2 * pad) / res) ** 2
+        worker_memory = 500 + pixels * layers * 8 / 1e6
+        nprocesses = int(min(nprocesses, max(1, max_memory // worker_memory)))
+        logger.info(
+            f"Using {nprocesses} processes with about {worker_memory:.0f} MB each."
+        )
 
-    cutout = load_cutout(snakemake.input.cutout)
-    regions = gpd.read_file(snakemake.input.regions)
-    assert not regions.empty, (
-        f"List of regions in {snakemake.input.regions} is empty, please "
-        "disable the corresponding renewable technology"
+    dst = (cutout.transform_r, cutout.crs, cutout.shape)
+    tasks = tqdm(
+        zip(tiles.values, windows),
+        total=len(tiles),
+        desc="Compute availability matrix",
+        disable=disable_progressbar,
     )
-    # do not pull up, set_index does not work if geo dataframe is empty
-    regions = regions.set_index("name").rename_axis("bus")
+    if nprocesses:
+        # resolve the worker from an importable module, as the pool spawns
+        module = importlib.import_module("scripts.determine_availability_matrix")
+        with mp.get_context("spawn").Pool(
+            processes=nprocesses,
+            initializer=module._init_tile_worker,
+            initargs=(excluder, *dst),
+            maxtasksperchild=20,
+        ) as pool:
+            availability = pool.starmap(module._tile_availability, tasks)
+    else:
+        availability = [
+            _tile_availability(piece, window, excluder, *dst) for piece, window in tasks
+        ]
+
+    # flip y axis, as the target raster is spanned top-down
+    availability = xr.DataArray(
+        np.stack(availability)[:, ::-1],
+        coords=[
+            ("bus", tiles.index),
+            ("y", cutout.data.y.data),
+            ("x", cutout.data.x.data),
+        ],
+    )
+    availability = availability.groupby("bus").sum()
+    return availability.reindex(bus=regions.index, fill_value=0.0)
+
+
+def build_excluder(params, inputs):
+    """
+    Build the exclusion container of a renewable technology.
+
+    Parameters
+    ----------
+    params : dict
+        Renewable configuration of the technology.
+    inputs : snakemake.io.InputFiles
+        Rule inputs with the exclusion layers.
 
+    Returns
+    -------
+    atlite.ExclusionContainer
+    """
     res = params.get("excluder_resolution", 100)
     excluder = atlite.ExclusionContainer(crs=3035, res=res)
 
     if params["natura"]:
-        excluder.add_raster(snakemake.input.natura, nodata=0, allow_no_overlap=True)
+        excluder.add_raster(inputs.natura, nodata=0, allow_no_overlap=True)
 
     for dataset in ["corine", "luisa"]:
         kwargs = {"nodata": 0} if dataset == "luisa" else {}
@@ -114,13 +331,13 @@ if __name__ == "__main__":
         if "grid_codes" in settings:
             codes = settings["grid_codes"]
             excluder.add_raster(
-                snakemake.input[dataset], codes=codes, invert=True, crs=3035, **kwargs
+                inputs[dataset], codes=codes, invert=True, crs=3035, **kwargs
             )
         if settings.get("distance", 0.0) > 0.0:
             codes = settings["distance_grid_codes"]
             buffer = settings["distance"]
             excluder.add_raster(
-                snakemake.input[dataset], codes=codes, buffer=buffer, crs=3035, **kwargs
+                inputs[dataset], codes=codes, buffer=buffer, crs=3035, **kwargs
             )
 
     if params.get("ship_threshold"):
@@ -129,7 +346,7 @@ if __name__ == "__main__":
         )  # approximation because 6 years of data which is hourly collected
         func = functools.partial(np.less, shipping_threshold)
         excluder.add_raster(
-            snakemake.input.ship_density, codes=func, crs=4326, allow_no_overlap=True
+            inputs.ship_density, codes=func, crs=4326, allow_no_overlap=True
         )
 
     if params.get("max_depth"):
@@ -137,39 +354,83 @@ if __name__ == "__main__":
         # use named function np.greater with partially frozen argument instead
         # and exclude areas where: -max_depth > grid cell depth
         func = functools.partial(np.greater, -params["max_depth"])
-        excluder.add_raster(snakemake.input.gebco, codes=func, crs=4326, nodata=-1000)
+        excluder.add_raster(inputs.gebco, codes=func, crs=4326, nodata=-1000)
 
     if params.get("min_depth"):
         func = functools.partial(np.greater, -params["min_depth"])
         excluder.add_raster(
-            snakemake.input.gebco, codes=func, crs=4326, nodata=-1000, invert=True
+            inputs.gebco, codes=func, crs=4326, nodata=-1000, invert=True
         )
 
     if "min_shore_distance" in params:
         buffer = params["min_shore_distance"]
-        excluder.add_geometry(snakemake.input.country_shapes, buffer=buffer)
+        excluder.add_geometry(inputs.country_shapes, buffer=buffer)
 
     if "max_shore_distance" in params:
         buffer = params["max_shore_distance"]
-        excluder.add_geometry(
-            snakemake.input.country_shapes, buffer=buffer, invert=True
-        )
+        excluder.add_geometry(inputs.country_shapes, buffer=buffer, invert=True)
+
+    return excluder
 
-    logger.info(f"Calculate landuse availability for {technology}...")
-    start = time.time()
 
-    kwargs = dict(nprocesses=nprocesses, disable_progressbar=noprogress)
-    availability = cutout.availabilitymatrix(regions, excluder, **kwargs)
+if __name__ == "__main__":
+    if "snakemake" not in globals():
+        from scripts._helpers import mock_snakemake
+
+        snakemake = mock_snakemake(
+            "build_renewable_profiles", clusters=100, technology="onwind"
+        )
+    configure_logging(snakemake)
+    set_scenario_config(snakemake)
+
+    nprocesses = int(snakemake.threads)
+    noprogress = snakemake.config["run"].get("disable_progressbar", True)
+    noprogress = noprogress or not snakemake.config["atlite"]["show_progress"]
+    technology = snakemake.wildcards.technology
+    params = snakemake.params.renewable[technology]
 
-    duration = time.time() - start
-    logger.info(
-        f"Completed landuse availability calculation for {technology} ({duration:2.2f}s)"
+    cutout = load_cutout(snakemake.input.cutout)
+    regions = gpd.read_file(snakemake.input.regions)
+    assert not regions.empty, (
+        f"List of regions in {snakemake.input.regions} is empty, please "
+        "disable the corresponding renewable technology"
     )
+    # do not pull up, set_index does not work if geo dataframe is empty
+    regions = regions.set_index("name").rename_axis("bus")
+
+    if "availability_matrix_base" in snakemake.input.keys():
+        logger.info(f"Aggregate base landuse availability for {technology}...")
+        busmap = pd.read_csv(snakemake.input.busmap, index_col=0, dtype=str)
+        availability = aggregate_availability_matrix(
+            xr.load_dataarray(snakemake.input.availability_matrix_base),
+            busmap.squeeze("columns"),
+            regions.index,
+        )
+    else:
+        logger.info(f"Calculate landuse availability for {technology}...")
+        start = time.time()
+
+        excluder = build_excluder(params, snakemake.input)
+
+        kwargs = dict(nprocesses=nprocesses, disable_progressbar=noprogress)
+        tile_size = snakemake.config["atlite"].get("availability_tile_size")
+        if tile_size:
+            max_memory = snakemake.resources.get("mem_mb")
+            availability = tiled_availabilitymatrix(
+                cutout, regions, excluder, tile_size, max_memory=max_memory, **kwargs
+            )
+        else:
+            availability = cutout.availabilitymatrix(regions, excluder, **kwargs)
+
+        duration = time.time() - start
+        logger.info(
+            f"Completed landuse availability calculation for {technology} ({duration:2.2f}s)"
+        )
 
     # For Moldova and Ukraine: Overwrite parts not covered by Corine with
     # externally determined available areas
     if "availability_matrix_MD_UA" in snakemake.input.keys():
-        availability_MDUA = xr.open_dataarray(
+        availability_MDUA = xr.load_dataarray(
             snakemake.input["availability_matrix_MD_UA"]
         )
         availability.loc[availability_MDUA.coords] = availability_MDUA
@@ -7,233 +7,517 @@ import xarray as xr
 import pandas as pd
 import pandas as pd
 import logging
+import linopy
+from scipy.spatial import KDTree
 
 logger = logging.getLogger(__name__)
 
 
-def apply_custom_ramping(n):
+def aggregate_identical_units(n, carriers):
+    """
+    Merge links of ``carriers`` that differ only in their name and capacity.
 
-    rampings = pd.read_csv("validation/ember_data/ramping.csv", index_col=0)
+    Units without time-varying attributes that share all other static
+    attributes are replaced by the first unit of the group, which takes the
+    summed capacity.
 
-    for tech in rampings.columns:
-        idx = n.links.query("carrier == @tech").index
+    Returns
+    -------
+    int
+        Number of removed links.
+    """
+    links = n.links[n.links.carrier.isin(carriers)]
+    dynamic = set().union(*(df.columns for df in n.links_t.values()))
+    links = links.drop(links.index.intersection(dynamic))
+
+    capacity = ["p_nom", "p_nom_min", "p_nom_max", "p_nom_opt"]
+    keys = links.columns.difference(capacity)
+    group = links[keys].fillna("").groupby(keys.tolist(), sort=False).ngroup()
+    representative = links.index.to_series().groupby(group).transform("first")
+
+    totals = links[capacity].groupby(representative).sum()
+    n.links.loc[totals.index, capacity] = totals
+    merged = links.index.difference(totals.index)
+    n.remove("Link", merged)
+    return len(merged)
+
+
+def apply_custom_ramping(
+    n,
+    mode="committable",
+    aggregate_units=False,
+    fn="validation/ember_data/ramping.csv",
+):
+    """
+    Apply unit ramping parameters from ``fn`` to the links of each technology.
+
+    Minimum up and down times are given in hours and ramp limits as share of
+    capacity per hour; both are converted to the snapshot resolution.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+    mode : {"committable", "ramp_limits"}
+        ``"committable"`` makes the units committable and applies all
+        parameters; combined with ``solving: options:
+        linearized_unit_commitment`` this solves as an LP. ``"ramp_limits"``
+        applies only the ramp limits without commitment variables.
+    aggregate_units : bool
+        Merge identical units per bus before applying the parameters, see
+        :func:`aggregate_identical_units`.
+    fn : str
+        Table of ramping parameters with one column per technology.
+    """
+    if mode not in ("committable", "ramp_limits"):
+        raise ValueError(f"Unknown ramping mode '{mode}'.")
+
+    rampings = pd.read_csv(fn, index_col=0)
+    hours = n.snapshot_weightings.generators.mean()
+
+    if aggregate_units:
+        removed = aggregate_identical_units(n, rampings.columns)
+        logger.info(f"Merged {removed} identical units before applying ramping.")
+
+    times = rampings.index.intersection(["min_up_time", "min_down_time"])
+    limits = rampings.index.intersection(
+        ["ramp_limit_up", "ramp_limit_down", "ramp_limit_start_up", "ramp_limit_shut_down"]
+    )
+    params = pd.concat(
+        [np.ceil(rampings.loc[times] / hours).astype(int), (rampings.loc[limits] * hours).clip(upper=1)]
+    )
+    if mode == "ramp_limits":
+        params = params.loc[params.index.intersection(["ramp_limit_up", "ramp_limit_down"])]
+
+    carrier = n.links.carrier
+    idx = carrier.index[carrier.isin(params.columns)]
+    for param, values in params.iterrows():
+        n.links.loc[idx, param] = carrier[idx].map(values).astype(n.links[param].dtype)
+    if mode == "committable":
         n.links.loc[idx, "committable"] = True
-        for param in rampings.index:
-            param_value = float(rampings[tech].loc[param])
-            if param in [
-                "min_up_time", "min_down_time",
-                "ramp_limit_up", "ramp_limit_down",
-                "ramp_limit_start_up", "ramp_limit_shut_down"
-            ]:
-                param_value /= n.snapshot_weightings.generators.mean()
-                param_value = int(np.ceil(param_value))
-            n.links.loc[idx, param] = param_value
-
-
-def apply_2023_nuclear_decommissioning(n, year=2023):
+
+
+def _to_unit_vectors(x, y):
+    """Map longitudes and latitudes in degrees onto the unit sphere."""
+    lon = np.radians(np.asarray(x, dtype=float))
+    lat = np.radians(np.asarray(y, dtype=float))
+    return np.column_stack(
+        [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)]
+    )
+
+
+class NearestLocator:
+    """
+    Nearest-neighbour lookup of locations within the same country.
+
+    One KD-tree per country is built lazily on first use and reused for all
+    later queries. Locations are embedded on the unit sphere, where the
+    ranking by chord length equals the ranking by great-circle distance.
+
+    Parameters
+    ----------
+    locations : pd.DataFrame
+        Candidate locations with columns ``x``, ``y`` (degrees) and
+        ``country``, indexed by name.
+    """
+
+    def __init__(self, locations):
+        self.locations = locations
+        self._trees = {}
+
+    def _tree(self, country):
+        if country not in self._trees:
+            loc = self.locations[self.locations.country == country]
+            tree = KDTree(_to_unit_vectors(loc.x, loc.y)) if len(loc) else None
+            self._trees[country] = (loc.index, tree)
+        return self._trees[country]
+
+    def nearest(self, points):
+        """
+        Return the name of the nearest location in the country of each point.
+
+        Parameters
+        ----------
+        points : pd.DataFrame
+            Points with columns ``x``, ``y`` and ``country``.
+
+        Returns
+        -------
+        pd.Series
+            Nearest location per point, NaN if the country has no candidates.
+        """
+        nearest = pd.Series(np.nan, index=points.index, dtype=object)
+        for country, group in points.groupby("country"):
+            names, tree = self._tree(country)
+            if tree is None:
+                continue
+            _, ind = tree.query(_to_unit_vectors(group.x, group.y))
+            nearest[group.index] = names[ind]
+        return nearest
+
+    def ranked(self, x, y, country):
+        """Return the locations of ``country`` ordered by distance to (x, y)."""
+        names, tree = self._tree(country)
+        if tree is None:
+            return names
+        _, ind = tree.query(_to_unit_vectors([x], [y])[0], k=len(names))
+        return names[np.atleast_1d(ind)]
+
+
+def apply_2023_nuclear_decommissioning(n, locator, year=2023):
+    """
+    Decommission the German nuclear units shut down in April 2023.
+
+    Each plant is matched to the not yet matched nuclear unit at the AC bus
+    closest to it.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+    locator : NearestLocator
+        Locator over the AC buses.
+    year : int
+        Year of the snapshots.
+    """
     if year == 2023:
         nuclear_info = {
-            "Isar 2": {"coords": [12.29315, 48.60560556], "country": 'DE', "dateout": "2023-04-15"},
-            "Emsland": {"coords": [7.317858333, 52.47423056], "country": 'DE', "dateout": "2023-04-15"},
-            "Neckarwestheim 2": {"coords": [9.175, 49.04111111], "country": 'DE', "dateout": "2023-04-15"},
+            "Isar 2": {
+                "coords": [12.29315, 48.60560556],
+                "country": "DE",
+                "dateout": "2023-04-15",
+            },
+            "Emsland": {
+                "coords": [7.317858333, 52.47423056],
+                "country": "DE",
+                "dateout": "2023-04-15",
+            },
+            "Neckarwestheim 2": {
+                "coords": [9.175, 49.04111111],
+                "country": "DE",
+                "dateout": "2023-04-15",
+            },
         }
 
-    seen_plants = []
+    nuclear = n.links.query("carrier == 'nuclear'")
+
+    seen_plants = set()
     for plant, info in nuclear_info.items():
-        # network details
-        country = nuclear_info[plant]["country"]
-        country_buses = n.buses.query("country in @country").index
-        network_coords = (
-            n.buses.loc[n.links.query("carrier == 'nuclear' and bus1 in @country_buses").bus1, ["x", "y"]]
-            .set_index(n.links.query("carrier == 'nuclear' and bus1 in @country_buses").index)
+        # closest country nuclear plant not matched yet
+        px, py = info["coords"]
+        buses = locator.ranked(px, py, info["country"])
+        candidates = (nuclear.index[nuclear.bus1 == bus] for bus in buses)
+        nearest_gen = next(
+            c for units in candidates for c in units if c not in seen_plants
         )
-        network_coords = network_coords.drop(index=seen_plants)
 
-        # plant details
+        # decommission
         dateout = pd.Timestamp(info["dateout"])
-        px, py = info["coords"]
-        dx = network_coords["x"].to_numpy() - px
-        dy = network_coords["y"].to_numpy() - py
+        n.links_t.p_max_pu[nearest_gen] = n.links.loc[nearest_gen].p_max_pu * (
+            (n.snapshots < dateout).astype(int)
+        )
 
-        # closest country nuclear plant
-        dist = np.sqrt(dx**2 + dy**2)
-        nearest_gen = network_coords.index[np.argmin(dist)]
+        seen_plants.add(nearest_gen)
 
-        # decommission
-        n.links_t.p_max_pu[nearest_gen] = (
-            n.links.loc[nearest_gen].p_max_pu * ((n.snapshots < dateout).astype(int))
-        )
 
-        seen_plants.append(nearest_gen)
+def _assign_marginal_cost_t(n, c, marginal_cost_t):
+    """Replace the columns of ``marginal_cost_t`` in one concatenation."""
+    pnl = n.pnl(c)
+    existing = pnl["marginal_cost"].drop(columns=marginal_cost_t.columns, errors="ignore")
+    pnl["marginal_cost"] = pd.concat([existing, marginal_cost_t], axis=1)
 
 
-def apply_hourly_fuel_prices(n, carriers, fn_hourly_prices):
-    df = pd.read_csv(fn_hourly_prices)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.set_index('timestamp', inplace=True)
-       
-    if not df.index.equals(n.snapshots):
-        logger.warning("Snapshot indices do not match exactly. Overwriting prices index with network snapshots.")
-        df.index = n.snapshots
-    
-    if 'marginal_cost' not in n.generators_t:
-        n.generators_t['marginal_cost'] = pd.DataFrame(index=n.snapshots, columns=[])
-    
-    for carrier in carriers:
-        idx = n.generators.index[n.generators.carrier == carrier]
-        if len(idx) == 0:
-            continue
-        if carrier == 'gas':
-            price_col = 'GAS_SPOT_PRICE_EUR_PER_MWH'
-        elif carrier == 'coal':
-            price_col = 'COAL_SPOT_PRICE_EUR_PER_MWH'
-        else:
-            price_col = 'LIGNITE_SPOT_PRICE_EUR_PER_MWH'
-        prices = df[price_col]
-        
-        mc_t_array = prices.to_numpy()[:, np.newaxis]
-        mc_t_df = pd.DataFrame(mc_t_array, index=prices.index, columns=idx)
-        n.generators_t['marginal_cost'][idx] = mc_t_df
-
-
-def apply_custom_pf_constraint(n,
-                               link_name="AL -> GR NTC 2025",
-                               E_min=153 * 0.95, # MWh; use 153e3 if you meant 153 GWh
-                               E_max=153 * 1.05, # MWh
-                               bidirectional=False,
-                               debug=False):
-    m = n.model
-    w = n.snapshot_weightings["objective"]  # hours per snapshot
-
-    # 1) pick link flow variable
-    if "Link-p0" in m.variables:
-        v = m.variables["Link-p0"]
-        var_name = "Link-p0"
-    elif "Link-p" in m.variables:
-        v = m.variables["Link-p"]
-        var_name = "Link-p"
-    else:
-        raise RuntimeError("No link power variable ('Link-p0' or 'Link-p') found.")
+def _align_to_snapshots(prices, snapshots):
+    """
+    Average hourly ``prices`` over the hours represented by each snapshot.
 
-    # 2) coord/dim name
-    if "link" in v.dims:
-        dim = "link"
-    elif "Link" in v.dims:
-        dim = "Link"
-    else:
-        raise RuntimeError(f"Unexpected dims for {var_name}: {v.dims}")
-
-    if debug:
-        print(f"using var={var_name}, dims={v.dims}, dim='{dim}'")
-        for c in v.coords:
-            vals = list(v.coords[c].values)
-            print(f"coord {c} (len={len(vals)}):", vals[:3], "...")
-
-    # 3) make sure the label actually exists
-    if link_name not in n.links.index:
-        # helpful hint: show a few labels the model actually uses
-        some = list(n.links.index[:5])
-        raise KeyError(f"Link '{link_name}' not found in n.links.index. "
-                       f"Examples: {some}")
-
-    # 4) select ONE link as a 1-D vector over 'snapshot'
-    #    IMPORTANT: use coords[...] not v[dim]; the latter indexes the variable
-    labels = v.coords[dim].values  # <-- THIS LINE FIXES YOUR ERROR
-    idx_arr = np.where(labels == link_name)[0]
-    if len(idx_arr) == 0:
-        few = list(labels[:5])
-        raise KeyError(f"Link '{link_name}' not found in variable coord '{dim}'. "
-                       f"First few labels: {few}")
-    p_sel = v.isel({dim: int(idx_arr[0])})   # dims now ('snapshot',)
-
-    # 5) align weights as 1-D DataArray on 'snapshot'
-    w_da = xr.DataArray(w.values, coords={"snapshot": n.snapshots}, dims=("snapshot",))
-
-    # 6) build the annual energy (MWh)
-    if bidirectional:
-        p_pos = m.add_variables(coords={"snapshot": n.snapshots},
-                                name=f"{link_name}_AtoB_pos", lb=0)
-        m.add_constraints(p_pos - p_sel >= 0, name=f"{link_name}_AtoB_pos_ge_flow")
-        energy = (p_pos * w_da).sum(dim="snapshot")
+    Snapshots of a temporally aggregated network stand for all hours up to
+    the next snapshot, like in ``set_temporal_aggregation``.
+    """
+    if prices.index.equals(snapshots):
+        return prices
+    if snapshots.isin(prices.index).all():
+        period = pd.Series(snapshots, index=snapshots).reindex(prices.index).ffill()
+        return prices.groupby(period).mean().reindex(snapshots)
+    if len(prices.index) != len(snapshots):
+        raise ValueError("Hourly fuel prices do not cover the network snapshots.")
+    logger.warning(
+        "Snapshot indices do not match exactly. Overwriting prices index with network snapshots."
+    )
+    return prices.set_axis(snapshots)
+
+
+def apply_hourly_fuel_prices(n, costs, carriers, fn_hourly_prices, mode="fuel_bus"):
+    """
+    Charge hourly fuel prices for gas, coal and lignite.
+
+    With ``mode="fuel_bus"`` the hourly price replaces the static fuel cost of
+    the supply generators at the fuel buses (e.g. ``EU gas``), giving a single
+    time series per carrier.
+
+    With ``mode="units"`` the fuel is paid by the assets that consume it:
+    links drawing from a fuel bus pay the price per MWh of fuel input, and
+    supply generators at the fuel buses are made free so that the fuel cost
+    is not counted twice. Pipelines between buses of the same fuel are left
+    untouched. Note that all fuel taken from a fuel bus is then charged at
+    the spot price, including biogas, synthetic fuels or imports fed into it.
+
+    Both modes only result in the same costs if the priced supply generators
+    are the only assets feeding the fuel buses, i.e. without stores (see
+    :func:`apply_hourly_price_fix`), biogas upgrading, methanation or
+    imports.
+
+    In both modes, generators of a fuel carrier outside the fuel buses pay
+    the price divided by their efficiency plus the variable operation and
+    maintenance cost of their carrier from ``costs``. Their static marginal
+    cost is not kept, as it already includes the static fuel cost. Consuming
+    links keep their static marginal cost, which only covers operation and
+    maintenance.
+
+    Only assets present in ``n`` are priced, so the function has to be
+    called once all fuel-consuming assets are added. It can be applied
+    repeatedly, e.g. after adding existing capacities. Prices are averaged
+    over the hours represented by each snapshot of a temporally aggregated
+    network.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+    costs : pd.DataFrame
+        Technology costs with column ``VOM``, indexed by carrier.
+    carriers : list[str]
+        Fuel carriers to price, must be variables of ``fn_hourly_prices``.
+    fn_hourly_prices : str
+        Path to the snapshot-aligned netCDF price table built by the
+        ``hourly_lignite_prices`` rule.
+    mode : {"fuel_bus", "units"}
+        Where to charge the fuel price.
+    """
+    if mode not in ("units", "fuel_bus"):
+        raise ValueError(f"Unknown hourly fuel price mode '{mode}'.")
+
+    with xr.open_dataarray(fn_hourly_prices) as da:
+        prices = da.sel(carrier=carriers).to_pandas()
+
+    prices = _align_to_snapshots(prices, n.snapshots)
+
+    bus_carrier = n.buses.carrier
+    is_fuel_bus = bus_carrier.isin(carriers)
+
+    gens = n.generators[n.generators.carrier.isin(carriers)]
+    at_fuel_bus = gens.bus.map(is_fuel_bus)
+    supply = gens[at_fuel_bus]
+    plants = gens[~at_fuel_bus]
+
+    if mode == "fuel_bus":
+        links = n.links.iloc[:0]
     else:
-        energy = (p_sel * w_da).sum(dim="snapshot")
+        n.generators.loc[supply.index, "marginal_cost"] = 0.0
+        n.generators_t.marginal_cost.drop(
+            columns=supply.index, errors="ignore", inplace=True
+        )
+        supply = supply.iloc[:0]
 
-    # 7) enforce band/cap
-    m.add_constraints(energy >= E_min, name=f"{link_name}_annual_min")
-    m.add_constraints(energy <= E_max, name=f"{link_name}_annual_max")
-    
-    
-def include_coal_chps_for_selected_countries(n, costs, CHP_ppl_fn, country_code_map):
-    focus_full= country_code_map.keys()
-    df = pd.read_csv(CHP_ppl_fn, encoding='latin-1').rename(columns={'lon': 'x', 'lat': 'y'})
+        links = n.links[n.links.bus0.map(is_fuel_bus)]
+        links = links[links.bus1.map(bus_carrier) != links.bus0.map(bus_carrier)]
+
+    _assign_marginal_cost_t(
+        n,
+        "Generator",
+        pd.concat(
+            [
+                prices[supply.carrier].set_axis(supply.index, axis=1)
+                / supply.efficiency,
+                prices[plants.carrier].set_axis(plants.index, axis=1)
+                / plants.efficiency
+                + costs.loc[plants.carrier, "VOM"].values,
+            ],
+            axis=1,
+        ),
+    )
+    _assign_marginal_cost_t(
+        n,
+        "Link",
+        prices[links.bus0.map(bus_carrier)].set_axis(links.index, axis=1)
+        + links.marginal_cost,
+    )
+    logger.info(
+        f"Applied hourly fuel prices to {len(supply) + len(plants)} generators "
+        f"and {len(links)} links."
+    )
+
+
+def _border_flow(n, c, attr, branches, borders):
+    """
+    Return the weighted annual flow of ``branches`` summed per border.
+
+    Flows are counted positive from the first to the second country of a
+    border ``"A-B"``, and negative in the opposite direction.
+    """
+    var = n.model.variables[f"{c}-{attr}"]
+    dim = next(d for d in var.dims if d != "snapshot")
+
+    country0 = branches.bus0.map(n.buses.country)
+    country1 = branches.bus1.map(n.buses.country)
+    forward = (country0 + "-" + country1).where(lambda b: b.isin(borders))
+    backward = (country1 + "-" + country0).where(lambda b: b.isin(borders))
+    border = forward.fillna(backward).dropna()
+    if border.empty:
+        return None
+    sign = pd.Series(np.where(forward[border.index].notna(), 1.0, -1.0), border.index)
+
+    border = xr.DataArray(border.rename_axis(dim), name="border")
+    sign = xr.DataArray(sign.rename_axis(dim))
+    w = xr.DataArray(n.snapshot_weightings.objective)
+    flow = var.sel({dim: border[dim].values})
+    return (flow * sign * w).groupby(border).sum().sum("snapshot")
+
+
+def apply_custom_pf_constraint(n, bands):
+    """
+    Constrain the annual net exchange across country borders.
+
+    The exchange of a border ``"A-B"`` is the net energy flowing from A to B
+    over all AC lines and DC links connecting the two countries, weighted by
+    the snapshot weightings. All bands are added as two stacked constraints
+    ``Border-energy-min`` and ``Border-energy-max``.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+    bands : pd.DataFrame
+        Indexed by border ``"A-B"`` with columns ``E_min`` and ``E_max`` in
+        MWh.
+    """
+    borders = bands.index
+    flows = [
+        _border_flow(n, "Line", "s", n.lines, borders),
+        _border_flow(n, "Link", "p", n.links.query("carrier == 'DC'"), borders),
+    ]
+    flows = [f for f in flows if f is not None]
+    if not flows:
+        logger.warning("No branches found for any cross-border energy band.")
+        return
+    energy = linopy.merge(flows, dim="_term", join="outer")
+
+    found = pd.Index(energy.indexes["border"])
+    if missing := borders.difference(found).tolist():
+        logger.warning(f"No interconnections found for cross-border energy bands {missing}.")
+    bands = bands.loc[found].rename_axis("border")
+
+    n.model.add_constraints(
+        energy >= xr.DataArray(bands.E_min), name="Border-energy-min"
+    )
+    n.model.add_constraints(
+        energy <= xr.DataArray(bands.E_max), name="Border-energy-max"
+    )
+
+
+def include_coal_chps_for_selected_countries(
+    n, costs, CHP_ppl_fn, country_code_map, locator
+):
+    """
+    Add operating coal, lignite and gas CHPs at their nearest AC bus.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+    costs : pd.DataFrame
+    CHP_ppl_fn : str
+        Path to the CHP plant list.
+    country_code_map : dict
+        Mapping of country names in the plant list to country codes.
+    locator : NearestLocator
+        Locator over the AC buses.
+    """
+    focus_full = country_code_map.keys()
+    df = pd.read_csv(CHP_ppl_fn, encoding="latin-1").rename(
+        columns={"lon": "x", "lat": "y"}
+    )
     df = df.query("type == 'chp' and status == 'operating' and bus in @focus_full")
-    carrier_mapping = {'Hard coal': 'coal', 'Lignite': 'lignite', 'Gas':'gas'}
-    
-    for orig_carrier in df['carrier'].unique():
-        if orig_carrier not in carrier_mapping:
-            continue
+    carrier_mapping = {"Hard coal": "coal", "Lignite": "lignite", "Gas": "gas"}
+
+    df = df[df["carrier"].isin(carrier_mapping.keys())].assign(
+        country=lambda df: df["bus"].map(country_code_map),
+        eff=lambda df: df["efficiency"].fillna(0.32),
+        heat_eff=lambda df: df["heat_efficiency"].fillna(0.35),
+    )
+    df = df.dropna(subset=["country", "x", "y"])
+
+    df = df.assign(nearest_bus=locator.nearest(df))
+    df = df.assign(heat_bus=df["nearest_bus"] + " urban central heat")
+    df = df[df["heat_bus"].isin(n.buses.index)]
+
+    for orig_carrier, nearest_pairs in df.groupby("carrier"):
         map_carrier = carrier_mapping[orig_carrier]
-        sub_df = df.query('carrier == @orig_carrier').copy()
         n.add("Carrier", f"urban central {map_carrier} CHP", overwrite=True)
-        sub_df['country'] = sub_df['bus'].map(country_code_map)
-        sub_df = sub_df.dropna(subset=['country', 'x', 'y'])
-        unique_countries = sub_df['country'].unique()
-        power_buses = n.buses.query("carrier == 'AC' and country in @unique_countries")[['x', 'y', 'country']]
-        power_buses = power_buses.reset_index().rename(
-                  columns={
-                              'Bus': 'bus_id', 
-                              'x': 'bus_x',    
-                              'y': 'bus_y'      
-                          }
-                                                       )
-        if power_buses.empty:
-            continue
-        sub_df = sub_df.reset_index(drop=True)
-        sub_df['plant_id'] = sub_df.index
-        pairs = pd.merge(sub_df, power_buses, on='country')
-        pairs['dx'] = pairs['x'] - pairs['bus_x']
-        pairs['dy'] = pairs['y'] - pairs['bus_y']
-        pairs['dist'] = (pairs['dx']**2 + pairs['dy']**2)**0.5
-        min_dist_idx = pairs.groupby('plant_id')['dist'].idxmin()
-        min_dist_idx = min_dist_idx.dropna()
-        if min_dist_idx.empty:
-            continue
-        nearest_pairs = pairs.loc[min_dist_idx]
-        nearest_pairs['nearest_bus'] = nearest_pairs['bus_id']
-        nearest_pairs['heat_bus'] = nearest_pairs['nearest_bus'] + ' urban central heat'
-        nearest_pairs = nearest_pairs.query('heat_bus in @n.buses.index')
-        
-        if nearest_pairs.empty:
-            continue
-        nearest_pairs['eff'] = nearest_pairs['efficiency'].fillna(0.32)
-        nearest_pairs['heat_eff'] = nearest_pairs['heat_efficiency'].fillna(0.35)
-        link_names = (nearest_pairs['nearest_bus'] + '_' + map_carrier + '_chp_' + nearest_pairs['id'].str.replace(' ', '_')).tolist()
-        
-        if link_names:
-            n.add(
-                "Link",
-                link_names,
-                bus0=f"EU {map_carrier}",
-                bus1=nearest_pairs['nearest_bus'].tolist(),
-                bus2=nearest_pairs['heat_bus'].tolist(),
-                bus3="co2 atmosphere",
-                carrier=f"urban central {map_carrier} CHP",
-                p_nom_extendable=False,
-                p_nom=(nearest_pairs['p_nom'] / nearest_pairs['eff']).tolist(),
-                capital_cost=0,
-                marginal_cost=costs.at[map_carrier, 'VOM'],
-                efficiency=nearest_pairs['eff'].tolist(),
-                efficiency2=nearest_pairs['heat_eff'].tolist(),
-                efficiency3=costs.at[map_carrier, 'CO2 intensity'],
-                lifetime=25,
-                reversed=False
-            )
-            logger.info(f"Added {len(link_names)} {map_carrier} CHPs")
-
-def set_line_s_nom_to_ntc(n, ntc_fn):
-    n_clusters = len(n.buses.query("carrier == 'AC'"))
-    if n_clusters > 39:
-         raise ValueError("This feature doesn't work for n_clusters > 39")
+        link_names = (
+            nearest_pairs["nearest_bus"]
+            + "_"
+            + map_carrier
+            + "_chp_"
+            + nearest_pairs["id"].str.replace(" ", "_")
+        ).tolist()
+
+        n.add(
+            "Link",
+            link_names,
+            bus0=f"EU {map_carrier}",
+            bus1=nearest_pairs["nearest_bus"].tolist(),
+            bus2=nearest_pairs["heat_bus"].tolist(),
+            bus3="co2 atmosphere",
+            carrier=f"urban central {map_carrier} CHP",
+            p_nom_extendable=False,
+            p_nom=(nearest_pairs["p_nom"] / nearest_pairs["eff"]).tolist(),
+            capital_cost=0,
+            marginal_cost=costs.at[map_carrier, "VOM"],
+            efficiency=nearest_pairs["eff"].tolist(),
+            efficiency2=nearest_pairs["heat_eff"].tolist(),
+            efficiency3=costs.at[map_carrier, "CO2 intensity"],
+            lifetime=25,
+            reversed=False,
+        )
+        logger.info(f"Added {len(link_names)} {map_carrier} CHPs")
+
+
+def _country_pairs(country0, country1):
+    """Return an unordered country pair index for two aligned country arrays."""
+    pairs = np.sort(np.column_stack([country0, country1]).astype(str), axis=1)
+    return pd.MultiIndex.from_arrays(pairs.T, names=["country0", "country1"])
+
+
+def _scale_branches_to_ntc(branches, attr, ntc, bus_country):
+    """
+    Scale the capacities of cross-border branches to the NTC of their border.
+
+    Parallel branches share the NTC in proportion to their current capacity,
+    or equally if they have none.
+    """
+    country0 = branches.bus0.map(bus_country)
+    country1 = branches.bus1.map(bus_country)
+    cross_border = country0.notna() & country1.notna() & (country0 != country1)
+    branches = branches[cross_border]
+
+    pairs = _country_pairs(country0[cross_border], country1[cross_border])
+    in_ntc = pairs.isin(ntc.index)
+    branches, pairs = branches[in_ntc], pairs[in_ntc]
+
+    capacity = branches[attr].set_axis(pairs)
+    total = capacity.groupby(level=[0, 1]).transform("sum")
+    count = capacity.groupby(level=[0, 1]).transform("size")
+    target = ntc.reindex(pairs)
+    scaled = np.where(total > 0, capacity * target / total.where(total > 0), target / count)
+
+    return pd.Series(scaled, index=branches.index), pairs.unique()
+
+
+def set_line_s_nom_to_ntc(n, ntc_fn, focus_countries=("CZ", "DE", "GR", "IT", "NL", "PL")):
+    """
+    Set the capacity of cross-border AC lines and DC links to historical NTCs.
+
+    The NTC of each border is averaged over both directions and distributed
+    over the parallel AC lines, and separately over the parallel DC links,
+    in proportion to their current capacity. Only borders touching one of
+    ``focus_countries`` are adjusted.
+    """
     df = pd.read_csv(ntc_fn)
     
     iso3_to_iso2 = {
@@ -250,44 +534,30 @@ def set_line_s_nom_to_ntc(n, ntc_fn):
     df['source_iso2'] = df['source_country_code'].map(iso3_to_iso2)
     df['target_iso2'] = df['target_country_code'].map(iso3_to_iso2)
     df = df.dropna(subset=['source_iso2', 'target_iso2'])
-    pairs = []
-    for index, row in df.iterrows():
-        pair = tuple(sorted([row['source_iso2'], row['target_iso2']]))
-        pairs.append(pair)
-    df['pair'] = pairs
-    pair_to_ntc = df.groupby('pair')['NTC_2030_MW'].mean()
-    focus_countries_3 = ['CZ', 'DE', 'GR', 'IT', 'NL', 'PL']
-    for pair, avg_flow in pair_to_ntc.items():
-        if avg_flow == 0:
-            continue
-        country1, country2 = pair
-        if country1 not in focus_countries_3 and country2 not in focus_countries_3:
-            continue
-        buses1 = n.buses.query('country == @country1').index
-        buses2 = n.buses.query('country == @country2').index
-        lines_between = n.lines.query('(bus0 in @buses1 and bus1 in @buses2) or (bus0 in @buses2 and bus1 in @buses1)')
-        links_between = n.links.query("carrier == 'DC' and ((bus0 in @buses1 and bus1 in @buses2) or (bus0 in @buses2 and bus1 in @buses1))")
-        updated = False
-        if not lines_between.empty:
-            current_total_s_nom = lines_between['s_nom'].sum()
-            if current_total_s_nom > 0:
-                scale_factor = avg_flow / current_total_s_nom
-                n.lines.loc[lines_between.index, 's_nom'] *= scale_factor
-            else:
-                n.lines.loc[lines_between.index, 's_nom'] = avg_flow / len(lines_between)
-            updated = True
-        if not links_between.empty:
-            current_total_p_nom = links_between['p_nom'].sum()
-            if current_total_p_nom > 0:
-                scale_factor = avg_flow / current_total_p_nom
-                n.links.loc[links_between.index, 'p_nom'] *= scale_factor
-            else:
-                n.links.loc[links_between.index, 'p_nom'] = avg_flow / len(links_between)
-            updated = True
-        if updated:
-            logger.info(f"Set capacity to total {avg_flow} MW for interconnections between {country1} and {country2}")
-        else:
-            logger.warning(f"No interconnections found between {country1} and {country2}")
+
+    ntc = df['NTC_2030_MW'].set_axis(_country_pairs(df['source_iso2'], df['target_iso2']))
+    ntc = ntc.groupby(level=[0, 1]).mean()
+    ntc = ntc[
+        (ntc != 0)
+        & (
+            ntc.index.get_level_values(0).isin(focus_countries)
+            | ntc.index.get_level_values(1).isin(focus_countries)
+        )
+    ]
+
+    bus_country = n.buses.country.replace("", np.nan)
+    s_nom, line_pairs = _scale_branches_to_ntc(n.lines, 's_nom', ntc, bus_country)
+    p_nom, link_pairs = _scale_branches_to_ntc(
+        n.links.query("carrier == 'DC'"), 'p_nom', ntc, bus_country
+    )
+    n.lines.loc[s_nom.index, 's_nom'] = s_nom
+    n.links.loc[p_nom.index, 'p_nom'] = p_nom
+
+    updated = ntc.index.isin(line_pairs.union(link_pairs))
+    for (country1, country2), avg_flow in ntc[updated].items():
+        logger.info(f"Set capacity to total {avg_flow} MW for interconnections between {country1} and {country2}")
+    for country1, country2 in ntc.index[~updated]:
+        logger.warning(f"No interconnections found between {country1} and {country2}")
 
 
 def apply_hourly_price_fix(n):
@@ -1,12 +1,71 @@
+"""
+Build hourly gas, coal and lignite prices aligned to the model snapshots.
+
+Lignite has no liquid spot market, so its hourly price is derived from the
+coal spot price scaled to the configured average lignite fuel cost. The
+result is cached as a netCDF file with dimensions ``(snapshot, carrier)`` so
+that downstream rules can assign it without re-parsing the CSV.
+"""
+
+import logging
+
 import pandas as pd
+import xarray as xr
+
+from scripts._helpers import configure_logging, get_snapshots, set_scenario_config
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = {
+    "gas": "GAS_SPOT_PRICE_EUR_PER_MWH",
+    "coal": "COAL_SPOT_PRICE_EUR_PER_MWH",
+    "lignite": "LIGNITE_SPOT_PRICE_EUR_PER_MWH",
+}
+
 
 def hourly_lignity_from_coal(hourly_coal, avg_lignite):
+    hourly_lignite = avg_lignite * (hourly_coal / hourly_coal.mean())
+
+    return hourly_lignite
+
 
-    hourly_lignite = (
-        avg_lignite * ( hourly_coal / hourly_coal.mean() )
+def align_to_snapshots(prices: pd.DataFrame, snapshots: pd.DatetimeIndex):
+    """
+    Align an hourly price table to the model snapshots.
+
+    Prices are matched by timestamp where possible. If the timestamps do not
+    overlap but the lengths agree (e.g. a price year differing from the
+    weather year), the prices are relabelled positionally.
+
+    Parameters
+    ----------
+    prices : pd.DataFrame
+        Hourly prices indexed by timestamp.
+    snapshots : pd.DatetimeIndex
+        Model snapshots.
+
+    Returns
+    -------
+    pd.DataFrame
+        Prices indexed by ``snapshots``.
+    """
+    if prices.index.equals(snapshots):
+        return prices
+
+    aligned = prices.reindex(snapshots)
+    if not aligned.isna().any().any():
+        return aligned
+
+    if len(prices) != len(snapshots):
+        raise ValueError(
+            f"Hourly fuel prices ({len(prices)} rows) cannot be aligned to "
+            f"{len(snapshots)} snapshots."
+        )
+    logger.warning(
+        "Snapshot indices do not match exactly. Overwriting prices index with network snapshots."
     )
+    return prices.set_axis(snapshots)
 
-    return hourly_lignite
 
 if __name__ == "__main__":
     if "snakemake" not in globals():
@@ -15,15 +74,24 @@ if __name__ == "__main__":
         snakemake = mock_snakemake(
             "hourly_lignite_prices",
         )
-    
-    hourly_prices = pd.read_csv(snakemake.input[0], index_col=0)
-    avg_lignite = snakemake.config["costs"].get("fuel", {"lignite": 7.7})["lignite"]
+    configure_logging(snakemake)
+    set_scenario_config(snakemake)
 
-    hourly_lignite = hourly_lignity_from_coal(
-        hourly_prices["COAL_SPOT_PRICE_EUR_PER_MWH"],
-        avg_lignite
+    hourly_prices = pd.read_csv(snakemake.input[0], index_col=0, parse_dates=True)
+    hourly_prices.index = hourly_prices.index.tz_localize(None)
+    avg_lignite = snakemake.params.fuel_costs.get("lignite", 7.7)
+
+    hourly_prices[PRICE_COLUMNS["lignite"]] = hourly_lignity_from_coal(
+        hourly_prices[PRICE_COLUMNS["coal"]], avg_lignite
     )
 
-    hourly_prices["LIGNITE_SPOT_PRICE_EUR_PER_MWH"] = hourly_lignite
+    snapshots = get_snapshots(
+        snakemake.params.snapshots, snakemake.params.drop_leap_day
+    )
+    prices = align_to_snapshots(
+        hourly_prices[list(PRICE_COLUMNS.values())], snapshots
+    ).set_axis(list(PRICE_COLUMNS), axis=1)
+    prices.index.name = "snapshot"
+    prices.columns.name = "carrier"
 
-    hourly_prices.to_csv(snakemake.output[0])
+    xr.DataArray(prices, name="fuel_price").to_netcdf(snakemake.output[0])
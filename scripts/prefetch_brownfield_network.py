@@ -0,0 +1,50 @@
+# SPDX-FileCopyrightText: Contributors to PyPSA-Eur <https://github.com/pypsa/pypsa-eur>
+#
+# SPDX-License-Identifier: MIT
+"""
+Applies the brownfield modifications that do not depend on the solved network
+of the previous planning horizon, see
+:func:`add_brownfield.prefetch_brownfield_network`.
+
+Used with ``existing_capacities: brownfield_prefetch:``, so that this step can
+run while the previous planning horizon is still being solved.
+"""
+
+import logging
+
+import pypsa
+
+from scripts._helpers import (
+    configure_logging,
+    set_scenario_config,
+    update_config_from_wildcards,
+)
+from scripts.add_brownfield import prefetch_brownfield_network
+
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    if "snakemake" not in globals():
+        from scripts._helpers import mock_snakemake
+
+        snakemake = mock_snakemake(
+            "prefetch_brownfield_network",
+            clusters="39",
+            opts="",
+            sector_opts="",
+            planning_horizons=2050,
+        )
+
+    configure_logging(snakemake)
+    set_scenario_config(snakemake)
+
+    update_config_from_wildcards(snakemake.config, snakemake.wildcards)
+
+    year = int(snakemake.wildcards.planning_horizons)
+
+    n = pypsa.Network(snakemake.input.network)
+
+    prefetch_brownfield_network(n, snakemake.input, snakemake.params, year)
+
+    n.export_to_netcdf(snakemake.output[0])
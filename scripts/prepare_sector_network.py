@@ -46,7 +46,12 @@ from scripts.definitions.heat_system import HeatSystem
 from scripts.prepare_network import maybe_adjust_costs_and_potentials, add_emission_prices
 
 from scripts.ember_customization import (
-    apply_custom_ramping, apply_2023_nuclear_decommissioning, apply_hourly_fuel_prices, include_coal_chps_for_selected_countries, set_line_s_nom_to_ntc
+    NearestLocator,
+    apply_2023_nuclear_decommissioning,
+    apply_custom_ramping,
+    apply_hourly_fuel_prices,
+    include_coal_chps_for_selected_countries,
+    set_line_s_nom_to_ntc,
 )
 
 spatial = SimpleNamespace()
@@ -6460,12 +6465,6 @@ if __name__ == "__main__":
     if options["allam_cycle_gas"]:
         add_allam_gas(n, costs, pop_layout=pop_layout, spatial=spatial)
         
-    if snakemake.config["ember_settings"].get("ember_gas_price", False):
-        apply_hourly_fuel_prices(
-            n, carriers=["gas", "coal", "lignite"], fn_hourly_prices=snakemake.input.hourly_fuel_costs
-        )
-        logger.info("Applied hourly prices for gas, coal and lignite.")
-
     n = set_temporal_aggregation(
         n, snakemake.params.time_resolution, snakemake.input.snapshot_weightings
     )
@@ -6559,16 +6558,25 @@ if __name__ == "__main__":
 
     sanitize_carriers(n, snakemake.config)
     sanitize_locations(n)
-    if snakemake.config["ember_settings"].get("ramping", False):
-        apply_custom_ramping(n)
-        logger.info("Ramping constraints applied to relevant units.")
+    locator = NearestLocator(n.buses.query("carrier == 'AC'")[["x", "y", "country"]])
     if snakemake.config["ember_settings"].get("nuclear_decommissioning", False):
         logger.warning(
             "Decommissioning relevant nuclear units mid-year will only work "
             "if they are represented at a unit granularity."
         )
         logger.info("Decommissioning relevant nuclear units mid-year.")
-        apply_2023_nuclear_decommissioning(n, year=n.snapshots.year.unique()[0])
+        apply_2023_nuclear_decommissioning(
+            n, locator, year=n.snapshots.year.unique()[0]
+        )
+    if snakemake.config["ember_settings"].get("ramping", False):
+        apply_custom_ramping(
+            n,
+            mode=snakemake.config["ember_settings"].get("ramping_mode", "committable"),
+            aggregate_units=snakemake.config["ember_settings"].get(
+                "ramping_aggregate_units", False
+            ),
+        )
+        logger.info("Ramping constraints applied to relevant units.")
 
     # Apply emission prices
     emission_prices = snakemake.config["costs"]["emission_prices"]
@@ -6586,9 +6594,28 @@ if __name__ == "__main__":
             n, emission_prices=emission_prices, hourly_emission_prices_fn=hourly_emission_prices_fn
         )
     country_code_map = snakemake.config['ember_settings'].get('chp_countries', {})
-    include_coal_chps_for_selected_countries(n, costs, CHP_ppl_fn=snakemake.input.chp_data, country_code_map=country_code_map )
+    include_coal_chps_for_selected_countries(
+        n,
+        costs,
+        CHP_ppl_fn=snakemake.input.chp_data,
+        country_code_map=country_code_map,
+        locator=locator,
+    )
     if snakemake.config['ember_settings'].get('historical_ntc', False):
        set_line_s_nom_to_ntc(n, snakemake.input.ember_ntc_csv)
        logger.info("Restrict s_nom to NTC values")
 
+    # after all fuel-consuming assets are added
+    if snakemake.config["ember_settings"].get("ember_gas_price", False):
+        apply_hourly_fuel_prices(
+            n,
+            costs,
+            carriers=["gas", "coal", "lignite"],
+            fn_hourly_prices=snakemake.input.hourly_fuel_costs,
+            mode=snakemake.config["ember_settings"].get(
+                "hourly_fuel_price_mode", "fuel_bus"
+            ),
+        )
+        logger.info("Applied hourly prices for gas, coal and lignite.")
+
     n.export_to_netcdf(snakemake.output[0])
@@ -26,11 +26,14 @@ Additionally, some extra constraints specified in :mod:`solve_network` are added
     based on the rule :mod:`solve_network`.
 """
 
+import hashlib
 import importlib
+import json
 import logging
 import os
 import re
 import sys
+from collections.abc import Iterable
 from functools import partial
 from typing import Any
 
@@ -41,7 +44,7 @@ import pypsa
 import xarray as xr
 import yaml
 from linopy.remote.oetc import OetcCredentials, OetcHandler, OetcSettings
-from pypsa.descriptors import get_activity_mask
+from pypsa.descriptors import get_activity_mask, nominal_attrs
 from pypsa.descriptors import get_switchable_as_dense as get_as_dense
 
 from scripts._benchmark import memory_logger
@@ -1170,7 +1173,10 @@ def add_co2_atmosphere_constraint(n, snapshots):
 
 
 def extra_functionality(
-    n: pypsa.Network, snapshots: pd.DatetimeIndex, planning_horizons: str | None = None
+    n: pypsa.Network,
+    snapshots: pd.DatetimeIndex,
+    planning_horizons: str | None = None,
+    cross_border_energy: str | None = None,
 ) -> None:
     """
     Add custom constraints and functionality.
@@ -1183,6 +1189,9 @@ def extra_functionality(
         Simulation timesteps
     planning_horizons : str, optional
         The current planning horizon year or None in perfect foresight
+    cross_border_energy : str, optional
+        Path to the table of annual cross-border energy bands, constrained
+        if given
 
     Collects supplementary constraints which will be passed to
     ``pypsa.optimization.optimize``.
@@ -1199,8 +1208,9 @@ def extra_functionality(
         add_SAFE_constraints(n, config)
     if constraints["CCL"] and n.generators.p_nom_extendable.any():
         add_CCL_constraints(n, config, planning_horizons)
-    if config["ember_settings"].get("ntc_cross_country_pf_restriction", False):
-        apply_custom_pf_constraint(n)
+    if cross_border_energy is not None:
+        bands = pd.read_csv(cross_border_energy, index_col="border")
+        apply_custom_pf_constraint(n, bands)
 
     reserve = config["electricity"].get("operational_reserve", {})
     if reserve.get("activate"):
@@ -1279,6 +1289,864 @@ def check_objective_value(n: pypsa.Network, solving: dict) -> None:
             )
 
 
+def _scale_branch_terms(
+    m: linopy.Model, con_name: str, var_name: str, ratio: pd.Series
+) -> None:
+    """
+    Multiply the coefficients of all terms referring to ``var_name`` in
+    constraint ``con_name`` by the branch-wise ``ratio`` in place.
+    """
+    if con_name not in m.constraints:
+        return
+    var = m.variables[var_name]
+    dim = var.dims[-1]
+    labels = var.labels.transpose(..., dim).values
+    values = np.broadcast_to(
+        ratio.reindex(var.indexes[dim], fill_value=1.0).values, labels.shape
+    )
+    valid = labels >= 0
+    by_label = np.ones(m._xCounter)
+    by_label[labels[valid]] = values[valid]
+
+    con = m.constraints[con_name]
+    vars = con.vars.values
+    coeffs = con.coeffs.values
+    con.coeffs = con.coeffs.copy(
+        data=np.where(vars >= 0, coeffs * by_label[vars], coeffs)
+    )
+
+
+def _update_model_line_params(
+    n: pypsa.Network, x_prev: pd.Series, r_prev: pd.Series
+) -> None:
+    """
+    Propagate updated line impedances into the existing linopy model.
+
+    The Kirchhoff voltage law coefficients are proportional to ``x_pu_eff``
+    (``r_pu_eff`` for DC lines) and the loss tangents are linear in
+    ``r_pu_eff``, so both can be rescaled without rebuilding the model.
+    """
+    m = n.model
+    dc_i = n.lines.index[n.lines.carrier == "DC"]
+    x_ratio = n.lines.x_pu_eff / x_prev
+    r_ratio = n.lines.r_pu_eff / r_prev
+    kvl_ratio = x_ratio.copy()
+    kvl_ratio[dc_i] = r_ratio[dc_i]
+    _scale_branch_terms(m, "Kirchhoff-Voltage-Law", "Line-s", kvl_ratio)
+
+    r_ratio = r_ratio[~np.isclose(r_ratio, 1.0)]
+    if r_ratio.empty:
+        return
+    for name in m.constraints:
+        if name == "Line-loss_upper" or name.startswith("Line-loss_tangents"):
+            _scale_branch_terms(m, name, "Line-s", r_ratio)
+            con = m.constraints[name]
+            dim = m.variables["Line-s"].dims[-1]
+            scale = r_ratio.reindex(con.indexes[dim], fill_value=1.0)
+            con.rhs = con.rhs * xr.DataArray(scale.rename_axis(dim))
+
+
+def _fix_branch_capacities_in_model(
+    m: linopy.Model, c: str, attr: str, values: pd.Series
+) -> None:
+    """
+    Pin extendable branch capacities to ``values`` within an existing model.
+    """
+    var = m.variables[f"{c}-{attr}"]
+    dim = var.dims[0]
+    fixed = values.astype(float).reindex(var.indexes[dim]).rename_axis(dim)
+    fixed = xr.DataArray(fixed)
+    is_fixed = fixed.notnull()
+    var.lower = var.lower.where(~is_fixed, fixed)
+    var.upper = var.upper.where(~is_fixed, fixed)
+    for bound in ("lower", "upper"):
+        con_name = f"{c}-ext-{attr}-{bound}"
+        if con_name in m.constraints:
+            rhs = m.constraints[con_name].rhs
+            m.constraints[con_name].rhs = rhs.where(~is_fixed, fixed)
+
+
+def _capital_cost(
+    n: pypsa.Network, c: str, capacity: pd.Series, sns: pd.Index
+) -> float:
+    """
+    Capital cost of the assets ``capacity.index`` at the given ``capacity``,
+    weighted as in the objective of ``n.optimize``.
+    """
+    idx = capacity.index
+    cost = n.static(c).loc[idx, "capital_cost"]
+    if n._multi_invest:
+        periods = sns.unique("period")
+        weighting = n.investment_period_weightings.objective[periods]
+        active = pd.concat(
+            {period: n.get_active_assets(c, period)[idx] for period in periods},
+            axis=1,
+        )
+        cost = active @ weighting * cost
+    else:
+        cost = cost[n.get_active_assets(c)[idx]]
+    return (cost * capacity).sum()
+
+
+def optimize_transmission_expansion_iteratively_warmstart(
+    n: pypsa.Network,
+    snapshots: pd.Index | None = None,
+    msq_threshold: float = 0.05,
+    min_iterations: int = 1,
+    max_iterations: int = 100,
+    track_iterations: bool = False,
+    line_unit_size: float | None = None,
+    link_unit_size: dict | None = None,
+    line_threshold: float | None = None,
+    link_threshold: dict | None = None,
+    fractional_last_unit_size: bool = False,
+    multi_investment_periods: bool = False,
+    transmission_losses: int = 0,
+    linearized_unit_commitment: bool = False,
+    model_kwargs: dict | None = None,
+    extra_functionality: Any = None,
+    assign_all_duals: bool = False,
+    solver_name: str = "highs",
+    solver_options: dict | None = None,
+    **kwargs,
+) -> tuple[str, str]:
+    """
+    Iteratively optimise transmission expansion on a single in-memory model.
+
+    Same procedure as
+    ``n.optimize.optimize_transmission_expansion_iteratively``, but the linopy
+    model is built only once. Between iterations the line impedance
+    coefficients are updated in place (see :func:`_update_model_line_params`)
+    and every re-solve is warm-started from the basis of the previous solve.
+    The final iteration with fixed (and optionally discretised) branch
+    capacities pins the capacity variables instead of rebuilding the model,
+    so with ``transmission_losses`` the loss tangents keep the linearisation
+    points of the extendable formulation.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+        The PyPSA network instance
+    snapshots : pd.Index, optional
+        Snapshots to optimise, defaults to ``n.snapshots``
+    msq_threshold, min_iterations, max_iterations, track_iterations : optional
+        Convergence settings as in PyPSA's iterative optimisation
+    line_unit_size, link_unit_size, line_threshold, link_threshold, fractional_last_unit_size : optional
+        Post-discretisation settings as in PyPSA's iterative optimisation
+    multi_investment_periods, transmission_losses, linearized_unit_commitment, model_kwargs : optional
+        Passed to ``n.optimize.create_model``
+    extra_functionality : callable, optional
+        Called once after the model is built
+    assign_all_duals : bool, default False
+        Whether to assign all dual values to the network
+    solver_name : str
+        Name of the solver to use
+    solver_options : dict, optional
+        Solver-specific options
+    **kwargs
+        Additional keyword arguments passed to ``linopy.Model.solve``
+
+    Returns
+    -------
+    status : str
+        Solution status of the final solve
+    condition : str
+        Termination condition of the final solve
+    """
+    from pypsa.optimization.abstract import discretized_capacity
+
+    solver_options = solver_options or {}
+    model_kwargs = model_kwargs or {}
+    link_threshold = link_threshold or {}
+    sns = n.snapshots if snapshots is None else snapshots
+
+    n.lines["carrier"] = n.lines.bus0.map(n.buses.carrier)
+    ext_i = n.lines.index[n.lines.s_nom_extendable]
+    typed_i = n.lines.query('type != ""').index
+    ext_untyped_i = ext_i.difference(typed_i)
+    ext_typed_i = ext_i.intersection(typed_i)
+    base_s_nom = (
+        np.sqrt(3)
+        * n.lines["type"].map(n.line_types.i_nom)
+        * n.lines.bus0.map(n.buses.v_nom)
+    )
+    n.lines.loc[ext_typed_i, "num_parallel"] = (n.lines.s_nom / base_s_nom)[ext_typed_i]
+
+    n._multi_invest = int(multi_investment_periods)
+    n._linearized_uc = linearized_unit_commitment
+    n.consistency_check(strict=["unknown_buses"])
+    m = n.optimize.create_model(
+        sns,
+        multi_investment_periods,
+        transmission_losses,
+        linearized_unit_commitment,
+        consistency_check=False,
+        **model_kwargs,
+    )
+    if extra_functionality:
+        extra_functionality(n, sns)
+
+    basis_fn = os.path.join(m.solver_dir, f"warmstart-{os.getpid()}.bas")
+
+    def solve(warmstart: bool) -> tuple[str, str]:
+        solve_kwargs = dict(kwargs, basis_fn=basis_fn)
+        if warmstart and os.path.exists(basis_fn):
+            solve_kwargs["warmstart_fn"] = basis_fn
+        status, condition = m.solve(
+            solver_name=solver_name, **solver_options, **solve_kwargs
+        )
+        if status == "ok":
+            n.optimize.assign_solution()
+            n.optimize.assign_duals(assign_all_duals)
+            n.optimize.post_processing()
+        return status, condition
+
+    branch_attrs = pd.Series(nominal_attrs)[list(n.branch_components)]
+    if track_iterations:
+        for c, attr in branch_attrs.items():
+            n.static(c)[f"{attr}_opt_0"] = n.static(c)[attr]
+
+    try:
+        iteration = 1
+        diff = msq_threshold
+        while diff >= msq_threshold or iteration < min_iterations:
+            if iteration > max_iterations:
+                logger.info(
+                    f"Iteration {iteration} beyond max_iterations {max_iterations}. Stopping ..."
+                )
+                break
+
+            s_nom_prev = (
+                n.lines.s_nom_opt.copy() if iteration > 1 else n.lines.s_nom.copy()
+            )
+            status, condition = solve(warmstart=iteration > 1)
+            if status != "ok":
+                raise RuntimeError(
+                    f"Optimization failed with status {status} and termination {condition}"
+                )
+            if track_iterations:
+                for c, attr in branch_attrs.items():
+                    n.static(c)[f"{attr}_opt_{iteration}"] = n.static(c)[f"{attr}_opt"]
+                setattr(n, f"status_{iteration}", status)
+                setattr(n, f"objective_{iteration}", n.objective)
+                n.iteration = iteration
+                n.global_constraints = n.global_constraints.rename(
+                    columns={"mu": f"mu_{iteration}"}
+                )
+
+            x_prev = n.lines.x_pu_eff.copy()
+            r_prev = n.lines.r_pu_eff.copy()
+            factor = n.lines.s_nom_opt / s_nom_prev
+            for attr, carrier in (("x", "AC"), ("r", "DC")):
+                ln_i = n.lines.index[n.lines.carrier == carrier].intersection(
+                    ext_untyped_i
+                )
+                n.lines.loc[ln_i, attr] /= factor[ln_i]
+            n.lines.loc[ext_typed_i, "num_parallel"] = (n.lines.s_nom_opt / base_s_nom)[
+                ext_typed_i
+            ]
+            n.calculate_dependent_values()
+            _update_model_line_params(n, x_prev, r_prev)
+
+            diff = (
+                np.sqrt((s_nom_prev - n.lines.s_nom_opt).pow(2).mean())
+                / n.lines.s_nom_opt.mean()
+            )
+            logger.info(f"Mean square difference after iteration {iteration} is {diff}")
+            iteration += 1
+
+        logger.info(
+            "Preparing final iteration with fixed and potentially discretized branches "
+            "(HVDC links and HVAC lines) on the existing model."
+        )
+        s_nom_fixed = n.lines.loc[ext_i, "s_nom_opt"]
+        if line_unit_size:
+            s_nom_fixed = n.lines.loc[ext_i].apply(
+                lambda row: discretized_capacity(
+                    nom_opt=row["s_nom_opt"],
+                    nom_max=row["s_nom_max"],
+                    unit_size=line_unit_size,
+                    threshold=line_threshold or 0.3,
+                    fractional_last_unit_size=fractional_last_unit_size,
+                ),
+                axis=1,
+            )
+        _fix_branch_capacities_in_model(m, "Line", "s_nom", s_nom_fixed)
+
+        link_carriers = {"DC"} | set(link_unit_size or {})
+        ext_links_i = n.links.index[
+            n.links.p_nom_extendable & n.links.carrier.isin(link_carriers)
+        ]
+        p_nom_fixed = n.links.loc[ext_links_i, "p_nom_opt"]
+        for carrier in set(link_unit_size or {}) & set(n.links.carrier.unique()):
+            idx = ext_links_i[n.links.loc[ext_links_i, "carrier"] == carrier]
+            p_nom_fixed[idx] = n.links.loc[idx].apply(
+                lambda row, carrier=carrier: discretized_capacity(
+                    nom_opt=row["p_nom_opt"],
+                    nom_max=row["p_nom_max"],
+                    unit_size=link_unit_size[carrier],
+                    threshold=link_threshold.get(carrier, 0.3),
+                    fractional_last_unit_size=fractional_last_unit_size,
+                ),
+                axis=1,
+            )
+        if not ext_links_i.empty:
+            _fix_branch_capacities_in_model(m, "Link", "p_nom", p_nom_fixed)
+
+        # fixed branches no longer count towards the investment already done
+        if "objective_constant" in m.variables:
+            n._objective_constant -= _capital_cost(
+                n, "Line", n.lines.s_nom[ext_i], sns
+            ) + _capital_cost(n, "Link", n.links.p_nom[ext_links_i], sns)
+            m.variables["objective_constant"].lower = n._objective_constant
+            m.variables["objective_constant"].upper = n._objective_constant
+
+        status, condition = solve(warmstart=True)
+    finally:
+        if os.path.exists(basis_fn):
+            os.remove(basis_fn)
+
+    if status == "ok":
+        # The pinned capacity variables still contribute their capital costs,
+        # which are not part of the objective in PyPSA's final iteration with
+        # non-extendable branches. Remove them and add the costs of additional
+        # infrastructure as in ``optimize_transmission_expansion_iteratively``.
+        n._objective -= _capital_cost(n, "Line", s_nom_fixed, sns) + _capital_cost(
+            n, "Link", p_nom_fixed, sns
+        )
+        obj_links = (
+            n.links.loc[ext_links_i]
+            .eval("capital_cost * (p_nom_opt - p_nom_min)")
+            .sum()
+        )
+        obj_lines = n.lines.eval("capital_cost * (s_nom_opt - s_nom_min)").sum()
+        n._objective += obj_links + obj_lines
+        n._objective_constant -= obj_links + obj_lines
+
+    return status, condition
+
+
+# solving settings that do not change the optimisation model
+MODEL_CACHE_IGNORED_SOLVING_KEYS = [
+    "solver",
+    "solver_options",
+    "check_objective",
+    "mem_logging_frequency",
+    "oetc",
+    "runtime",
+    "mem_mb",
+]
+
+
+def network_model_hash(
+    n: pypsa.Network, files: Iterable[str] = (), **model_settings: Any
+) -> str:
+    """
+    Hash the content of a network together with its model settings.
+
+    The versions of PyPSA and linopy are part of the hash, since they
+    determine the formulation of the optimisation model.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+        Prepared network.
+    files : iterable of str, optional
+        Further input files of the model, e.g. read by
+        ``extra_functionality``, whose content is hashed.
+    **model_settings
+        Further settings that change the optimisation model, e.g. the
+        configuration read by ``extra_functionality``. Must be JSON
+        serialisable or representable as string.
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest.
+    """
+    h = hashlib.sha256()
+    h.update(f"pypsa={pypsa.__version__};linopy={linopy.__version__}".encode())
+
+    def update(df: pd.DataFrame) -> None:
+        h.update(",".join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+
+    update(n.snapshot_weightings)
+    update(n.investment_period_weightings)
+    for c in n.iterate_components():
+        h.update(c.name.encode())
+        update(c.static)
+        for attr, df in c.dynamic.items():
+            if not df.empty:
+                h.update(attr.encode())
+                update(df)
+
+    for fn in files:
+        with open(fn, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+
+    h.update(json.dumps(model_settings, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def optimize_with_model_cache(
+    n: pypsa.Network,
+    cache_dir: str,
+    dependencies: Iterable[str] = (),
+    snapshots: pd.Index | None = None,
+    multi_investment_periods: bool = False,
+    transmission_losses: int = 0,
+    linearized_unit_commitment: bool = False,
+    model_kwargs: dict | None = None,
+    extra_functionality: Any = None,
+    assign_all_duals: bool = False,
+    solver_name: str = "highs",
+    solver_options: dict | None = None,
+    **kwargs: Any,
+) -> tuple[str, str]:
+    """
+    Optimise a network, reusing a previously built model if available.
+
+    The model is stored as linopy netCDF file in ``cache_dir`` under a hash of
+    the network content, the model settings, the configuration without
+    solver settings, the content of ``dependencies`` and the versions of
+    PyPSA and linopy. On a cache hit, model building and
+    ``extra_functionality`` are skipped and the stored model is passed
+    straight to the solver.
+
+    Cached models are never evicted. Every changed network or configuration
+    adds a file of the size of the model, so ``cache_dir`` has to be cleaned
+    up manually.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+        Network to optimise.
+    cache_dir : str
+        Directory of the model cache.
+    dependencies : iterable of str, optional
+        Files read by ``extra_functionality``.
+    snapshots, multi_investment_periods, transmission_losses, linearized_unit_commitment, model_kwargs, extra_functionality, assign_all_duals, solver_name, solver_options : optional
+        See :meth:`pypsa.Network.optimize`.
+    **kwargs
+        Keyword arguments passed to :meth:`linopy.Model.solve`.
+
+    Returns
+    -------
+    status : str
+        Solution status
+    condition : str
+        Termination condition
+    """
+    if model_kwargs is None:
+        model_kwargs = {}
+    if solver_options is None:
+        solver_options = {}
+
+    config = getattr(n, "config", {})
+    solving = {
+        k: v
+        for k, v in config.get("solving", {}).items()
+        if k not in MODEL_CACHE_IGNORED_SOLVING_KEYS
+    }
+    key = network_model_hash(
+        n,
+        files=dependencies,
+        snapshots=snapshots,
+        multi_investment_periods=multi_investment_periods,
+        transmission_losses=transmission_losses,
+        linearized_unit_commitment=linearized_unit_commitment,
+        config={**config, "solving": solving},
+        params=getattr(n, "params", {}),
+    )
+    fn = os.path.join(cache_dir, f"model-{key}.nc")
+
+    if os.path.exists(fn):
+        logger.info(f"Reusing cached optimisation model {fn}.")
+        n._multi_invest = int(multi_investment_periods)
+        n._linearized_uc = int(linearized_unit_commitment)
+        n._model = linopy.read_netcdf(fn)
+        if model_kwargs.get("solver_dir") is not None:
+            n.model.solver_dir = model_kwargs["solver_dir"]
+        if "objective_constant" in n.model.variables:
+            n._objective_constant = n.model.variables["objective_constant"].lower.item()
+        else:
+            n._objective_constant = 0
+    else:
+        sns = n.snapshots if snapshots is None else snapshots
+        n.optimize.create_model(
+            sns,
+            multi_investment_periods,
+            transmission_losses,
+            linearized_unit_commitment,
+            **model_kwargs,
+        )
+        if extra_functionality:
+            extra_functionality(n, sns)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{fn}.{os.getpid()}.tmp"
+        n.model.to_netcdf(tmp)
+        os.replace(tmp, fn)
+        logger.info(f"Stored optimisation model in cache {fn}.")
+
+    return n.optimize.solve_model(
+        solver_name=solver_name,
+        solver_options=solver_options,
+        assign_all_duals=assign_all_duals,
+        **kwargs,
+    )
+
+
+_rolling_horizon_network = None
+
+
+def _init_rolling_horizon_worker(n: pypsa.Network) -> None:
+    global _rolling_horizon_network
+    _rolling_horizon_network = n
+
+
+def _importable(func: Any) -> Any:
+    """
+    Return ``func`` as defined in ``scripts.solve_network`` if it was
+    defined in the script run as ``__main__``.
+
+    Functions of ``__main__`` can only be unpickled in worker processes
+    started by forking, whereas ``scripts.solve_network`` can be imported
+    with any start method.
+    """
+    if isinstance(func, partial):
+        return partial(_importable(func.func), *func.args, **func.keywords)
+    if getattr(func, "__module__", None) == "__main__":
+        module = importlib.import_module("scripts.solve_network")
+        return getattr(module, func.__qualname__, func)
+    return func
+
+
+def _copy_solve_attributes(n: pypsa.Network, m: pypsa.Network) -> pypsa.Network:
+    """
+    Copy the ``config`` and ``params`` attributes read by
+    ``extra_functionality`` from ``n`` to ``m``, as they are dropped by
+    :meth:`pypsa.Network.copy`.
+    """
+    for attr in ["config", "params"]:
+        if hasattr(n, attr):
+            setattr(m, attr, getattr(n, attr))
+    return m
+
+
+def _interpolate_storage_levels(
+    coarse: pypsa.Network, n: pypsa.Network, times: pd.DatetimeIndex
+) -> tuple:
+    """
+    Interpolate the storage levels of the coarse solve linearly at ``times``.
+
+    The level of a coarse snapshot is reached at the end of the hours it
+    represents; the initial level (or the final level if cyclic) holds at the
+    start of the first snapshot.
+    """
+    hours = pd.to_timedelta(coarse.snapshot_weightings.stores.values, unit="h")
+    points = (coarse.snapshots + hours).insert(0, coarse.snapshots[0])
+
+    levels = []
+    for static, dynamic, initial, cyclic in [
+        (n.stores, coarse.stores_t.e, "e_initial", "e_cyclic"),
+        (
+            n.storage_units,
+            coarse.storage_units_t.state_of_charge,
+            "state_of_charge_initial",
+            "cyclic_state_of_charge",
+        ),
+    ]:
+        if static.empty:
+            levels.append(None)
+            continue
+        dynamic = dynamic.reindex(columns=static.index)
+        start = static[initial].where(~static[cyclic], dynamic.iloc[-1])
+        values = np.vstack([start.values, dynamic.values])
+        levels.append(
+            pd.DataFrame(
+                {
+                    col: np.interp(times.asi8, points.asi8, values[:, j])
+                    for j, col in enumerate(static.index)
+                },
+                index=times,
+            )
+        )
+    return tuple(levels)
+
+
+def _add_storage_level_bands(
+    n: pypsa.Network, snapshot: Any, levels: tuple, tolerance: float
+) -> None:
+    """
+    Constrain the storage levels at ``snapshot`` to at least ``levels`` and at
+    most ``levels`` plus ``tolerance`` times the storage capacity.
+
+    The lower bound is exact, so that a window never ends with less energy
+    than the next window starts with.
+    """
+    capacities = (
+        n.stores.e_nom,
+        n.storage_units.p_nom * n.storage_units.max_hours,
+    )
+    for c, attr, level, capacity in zip(
+        ["Store", "StorageUnit"], ["e", "state_of_charge"], levels, capacities
+    ):
+        if level is None or level.empty:
+            continue
+        band = tolerance * capacity.clip(lower=1)
+        level_var = n.model[f"{c}-{attr}"].sel(snapshot=snapshot)
+        n.model.add_constraints(
+            level_var >= level.rename_axis(c), name=f"{c}-{attr}-band-lower"
+        )
+        n.model.add_constraints(
+            level_var <= (level + band).rename_axis(c), name=f"{c}-{attr}-band-upper"
+        )
+
+
+def _solve_rolling_horizon_window(
+    sns: pd.Index,
+    keep: pd.Index,
+    initial: tuple,
+    final: tuple | None,
+    tolerance: float,
+    kwargs: dict,
+) -> tuple[dict, str, str]:
+    """
+    Solve one rolling horizon window in a worker process.
+
+    The storage levels start at ``initial`` and, unless ``final`` is None,
+    end within ``tolerance`` times the storage capacity of ``final`` at the
+    last snapshot of ``keep``.
+
+    Returns the time-varying outputs for the snapshots ``keep`` and the
+    solver status and termination condition of the window.
+    """
+    n = _copy_solve_attributes(
+        _rolling_horizon_network, _rolling_horizon_network.copy(snapshots=sns)
+    )
+    e_initial, soc_initial = initial
+    if e_initial is not None:
+        n.stores.e_initial = e_initial
+    if soc_initial is not None:
+        n.storage_units.state_of_charge_initial = soc_initial
+
+    if final is not None:
+        extra_functionality = kwargs.get("extra_functionality")
+
+        def add_bands(n, sns):
+            if extra_functionality is not None:
+                extra_functionality(n, sns)
+            _add_storage_level_bands(n, keep[-1], final, tolerance)
+
+        kwargs = {**kwargs, "extra_functionality": add_bands}
+
+    status, condition = n.optimize(**kwargs)
+    if status != "ok":
+        logger.warning(
+            f"Optimization of window [{sns[0]}:{sns[-1]}] failed with status "
+            f"{status} and condition {condition}"
+        )
+        return {}, status, condition
+
+    results = {}
+    for c in n.iterate_components():
+        attrs = c.attrs[c.attrs.varying & c.attrs.status.str.startswith("Output")]
+        for attr, df in c.dynamic.items():
+            if attr in attrs.index and not df.empty:
+                results[(c.name, attr)] = df.loc[keep]
+    return results, status, condition
+
+
+def _storage_levels(n: pypsa.Network, snapshot: Any) -> tuple:
+    return (
+        n.stores_t.e.loc[snapshot] if not n.stores.empty else None,
+        n.storage_units_t.state_of_charge.loc[snapshot]
+        if not n.storage_units.empty
+        else None,
+    )
+
+
+def optimize_with_parallel_rolling_horizon(
+    n: pypsa.Network,
+    horizon: int = 100,
+    overlap: int = 0,
+    processes: int = 2,
+    presolve_resolution: str = "3h",
+    reconciliation_tolerance: float = 0.01,
+    **kwargs: Any,
+) -> tuple[str, str]:
+    """
+    Optimise a network in overlapping windows that are solved in parallel.
+
+    Unlike :meth:`pypsa.Network.optimize.optimize_with_rolling_horizon`, a
+    window does not wait for the storage levels of its predecessor. Instead,
+    the storage levels at all window boundaries are estimated from a cheap
+    pre-solve of the whole period at ``presolve_resolution``, interpolated
+    linearly to the start of the first snapshot of each window. Each window
+    starts from the estimate at its first snapshot and ends at least at the
+    estimate for the next window, but no more than ``reconciliation_tolerance``
+    (relative to the storage capacity) above it. If the pre-solve fails, the
+    windows are solved sequentially instead.
+
+    In a reconciliation pass, windows that are infeasible with these
+    boundaries, or whose initial levels deviate from the levels reached by
+    the preceding window by more than ``reconciliation_tolerance``, are
+    solved again from the reached levels without a final boundary.
+
+    The objective is recomputed from the operational expenditures of the
+    stitched dispatch.
+
+    Parameters
+    ----------
+    n : pypsa.Network
+        Network to optimise; results are written to its time series.
+    horizon : int
+        Number of snapshots in each window.
+    overlap : int
+        Number of snapshots shared by two consecutive windows. Results in the
+        overlap are taken from the later window.
+    processes : int
+        Number of worker processes.
+    presolve_resolution : str
+        Resampling offset of the pre-solve estimating the storage levels.
+    reconciliation_tolerance : float
+        Relative deviation of storage levels allowed at window boundaries.
+    **kwargs
+        Keyword arguments passed to :meth:`pypsa.Network.optimize`.
+
+    Returns
+    -------
+    status : str
+        "ok" if all windows were solved, else "warning"
+    condition : str
+        Termination condition of the last failed window, else "optimal"
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from scripts.prepare_network import average_every_nhours
+
+    if horizon <= overlap:
+        raise ValueError("overlap must be smaller than horizon")
+
+    logger.info(
+        f"Estimating storage levels from pre-solve at {presolve_resolution} resolution."
+    )
+    coarse = _copy_solve_attributes(n, average_every_nhours(n, presolve_resolution))
+    status, condition = coarse.optimize(**kwargs)
+    if status != "ok":
+        logger.warning(
+            f"Pre-solve failed with status {status} and condition {condition}. "
+            "Solving rolling horizon windows sequentially."
+        )
+        n.optimize.optimize_with_rolling_horizon(
+            horizon=horizon, overlap=overlap, **kwargs
+        )
+        return "", ""
+
+    snapshots = n.snapshots
+    starts = list(range(0, len(snapshots), horizon - overlap))
+    windows = [snapshots[s : min(len(snapshots), s + horizon)] for s in starts]
+    keeps = [snapshots[s:e] for s, e in zip(starts, starts[1:] + [len(snapshots)])]
+
+    # a window starting at snapshot s starts from the level at the end of
+    # snapshot s - 1, i.e. at the start of snapshot s
+    e, soc = _interpolate_storage_levels(coarse, n, snapshots[starts[1:]])
+    initials = [(n.stores.e_initial, n.storage_units.state_of_charge_initial)] + [
+        (
+            e.loc[snapshots[s]] if e is not None else None,
+            soc.loc[snapshots[s]] if soc is not None else None,
+        )
+        for s in starts[1:]
+    ]
+    finals = initials[1:] + [None]
+    conditions = [None] * len(windows)
+    failed = []
+
+    # resolve the worker functions from an importable module for start
+    # methods other than fork
+    module = importlib.import_module("scripts.solve_network")
+    if "extra_functionality" in kwargs:
+        kwargs["extra_functionality"] = _importable(kwargs["extra_functionality"])
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=module._init_rolling_horizon_worker,
+        initargs=(n,),
+    ) as pool:
+
+        def solve(indices):
+            futures = {
+                i: pool.submit(
+                    module._solve_rolling_horizon_window,
+                    windows[i],
+                    keeps[i],
+                    initials[i],
+                    finals[i],
+                    reconciliation_tolerance,
+                    kwargs,
+                )
+                for i in indices
+            }
+            for i, future in futures.items():
+                results, status, conditions[i] = future.result()
+                if status != "ok":
+                    failed.append(i)
+                for (c, attr), df in results.items():
+                    pnl = n.pnl(c)
+                    pnl[attr] = pnl[attr].reindex(
+                        index=snapshots, columns=pnl[attr].columns.union(df.columns)
+                    )
+                    pnl[attr].loc[df.index, df.columns] = df
+
+        logger.info(f"Solving {len(windows)} rolling horizon windows in parallel.")
+        solve(range(len(windows)))
+
+        capacities = (
+            n.stores.e_nom.clip(lower=1),
+            (n.storage_units.p_nom * n.storage_units.max_hours).clip(lower=1),
+        )
+
+        def deviation(i):
+            reached = _storage_levels(n, snapshots[starts[i] - 1])
+            return max(
+                [
+                    ((level - initial).abs() / capacity).max()
+                    for level, initial, capacity in zip(
+                        reached, initials[i], capacities
+                    )
+                    if level is not None and not level.empty
+                ],
+                default=0.0,
+            )
+
+        # re-solve infeasible windows without final boundary, and their
+        # successors from the reached levels until the levels join up again
+        pending = sorted(failed)
+        failed.clear()
+        i = pending[0] if pending else len(windows)
+        while i < len(windows):
+            logger.info(f"Reconciling storage levels from window {i + 1}.")
+            if i > 0:
+                initials[i] = _storage_levels(n, snapshots[starts[i] - 1])
+            finals[i] = None
+            solve([i])
+            if i + 1 < len(windows) and (
+                i + 1 in pending or not deviation(i + 1) <= reconciliation_tolerance
+            ):
+                i += 1
+            else:
+                i = next((j for j in pending if j > i), len(windows))
+
+    n._objective = n.statistics.opex().sum()
+    n._objective_constant = 0.0
+
+    if failed:
+        logger.warning(f"Rolling horizon windows {failed} remain unsolved.")
+        return "warning", conditions[failed[-1]]
+    return "ok", "optimal"
+
+
 def solve_network(
     n: pypsa.Network,
     config: dict,
@@ -1286,6 +2154,7 @@ def solve_network(
     solving: dict,
     rule_name: str | None = None,
     planning_horizons: str | None = None,
+    cross_border_energy: str | None = None,
     **kwargs,
 ) -> None:
     """
@@ -1305,6 +2174,8 @@ def solve_network(
         Name of the snakemake rule being executed
     planning_horizons : str, optional
             The current planning horizon year or None in perfect foresight
+    cross_border_energy : str, optional
+        Path to the table of annual cross-border energy bands
     **kwargs
         Additional keyword arguments passed to the solver
 
@@ -1333,7 +2204,9 @@ def solve_network(
     )
     kwargs["solver_name"] = solving["solver"]["name"]
     kwargs["extra_functionality"] = partial(
-        extra_functionality, planning_horizons=planning_horizons
+        extra_functionality,
+        planning_horizons=planning_horizons,
+        cross_border_energy=cross_border_energy,
     )
     kwargs["transmission_losses"] = cf_solving.get("transmission_losses", False)
     kwargs["linearized_unit_commitment"] = cf_solving.get(
@@ -1372,8 +2245,28 @@ def solve_network(
     if rolling_horizon and rule_name == "solve_operations_network":
         kwargs["horizon"] = cf_solving.get("horizon", 365)
         kwargs["overlap"] = cf_solving.get("overlap", 0)
-        n.optimize.optimize_with_rolling_horizon(**kwargs)
-        status, condition = "", ""
+        processes = cf_solving.get("rolling_horizon_processes", 1)
+        if processes > 1:
+            status, condition = optimize_with_parallel_rolling_horizon(
+                n, processes=processes, **kwargs
+            )
+            if status not in ("ok", ""):
+                raise RuntimeError(
+                    f"Rolling horizon windows failed with termination condition "
+                    f"'{condition}'. Discarding solution."
+                )
+        else:
+            n.optimize.optimize_with_rolling_horizon(**kwargs)
+            status, condition = "", ""
+    elif skip_iterations and cf_solving.get("model_cache", False):
+        dependencies = [
+            fn
+            for fn in [cross_border_energy, params.get("custom_extra_functionality")]
+            if fn
+        ]
+        status, condition = optimize_with_model_cache(
+            n, cf_solving["model_cache"], dependencies=dependencies, **kwargs
+        )
     elif skip_iterations:
         status, condition = n.optimize(**kwargs)
     else:
@@ -1383,9 +2276,15 @@ def solve_network(
         if cf_solving["post_discretization"].pop("enable"):
             logger.info("Add post-discretization parameters.")
             kwargs.update(cf_solving["post_discretization"])
-        status, condition = n.optimize.optimize_transmission_expansion_iteratively(
-            **kwargs
-        )
+        if cf_solving.get("iterative_warmstart", False):
+            logger.info("Solving iteratively on a single warm-started model.")
+            status, condition = optimize_transmission_expansion_iteratively_warmstart(
+                n, **kwargs
+            )
+        else:
+            status, condition = n.optimize.optimize_transmission_expansion_iteratively(
+                **kwargs
+            )
 
     if not rolling_horizon:
         if status != "ok":
@@ -1454,6 +2353,7 @@ if __name__ == "__main__":
             solving=snakemake.params.solving,
             planning_horizons=planning_horizons,
             rule_name=snakemake.rule,
+            cross_border_energy=snakemake.input.get("cross_border_energy"),
             log_fn=snakemake.log.solver,
         )
 
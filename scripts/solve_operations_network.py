@@ -53,6 +53,7 @@ if __name__ == "__main__":
         solving=snakemake.params.solving,
         log_fn=snakemake.log.solver,
         rule_name=snakemake.rule,
+        cross_border_energy=snakemake.input.get("cross_border_energy"),
     )
 
     n.meta = dict(snakemake.config, **dict(wildcards=dict(snakemake.wildcards)))
@@ -10,6 +10,7 @@ from urllib.request import urlretrieve
 from uuid import uuid4
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import pypsa
 import pytest
@@ -27,6 +28,90 @@ def ac_dc_network():
     return pypsa.examples.ac_dc_meshed(from_master=True)
 
 
+@pytest.fixture(scope="function")
+def meshed_network():
+    """
+    Small meshed AC network with an HVDC link and extendable transmission.
+    """
+    n = pypsa.Network()
+    n.set_snapshots(pd.date_range("2013-01-01", periods=6, freq="h"))
+    n.add("Carrier", ["AC", "DC", "gas", "wind"])
+    n.add("Bus", [f"bus{i}" for i in range(4)], v_nom=380, carrier="AC")
+    for i, (bus0, bus1) in enumerate([(0, 1), (1, 2), (2, 3), (3, 0), (0, 2)]):
+        n.add(
+            "Line",
+            f"line{i}",
+            bus0=f"bus{bus0}",
+            bus1=f"bus{bus1}",
+            x=0.1 * (i + 1),
+            r=0.01,
+            s_nom=100,
+            s_nom_min=50 if i == 0 else 0,
+            s_nom_extendable=True,
+            capital_cost=10 + i,
+        )
+    n.lines["s_nom_opt"] = n.lines.s_nom
+    n.add(
+        "Link",
+        "hvdc",
+        bus0="bus1",
+        bus1="bus3",
+        carrier="DC",
+        p_min_pu=-1,
+        p_nom_extendable=True,
+        capital_cost=30,
+    )
+    n.add("Generator", "gas", bus="bus0", carrier="gas", p_nom=1000, marginal_cost=10)
+    n.add(
+        "Generator",
+        "wind",
+        bus="bus2",
+        carrier="wind",
+        p_nom_extendable=True,
+        capital_cost=5,
+        marginal_cost=1,
+        p_max_pu=[0.2, 0.8, 1.0, 0.5, 0.1, 0.9],
+    )
+    n.add("Load", "load1", bus="bus1", p_set=[300, 200, 400, 350, 250, 300])
+    n.add("Load", "load3", bus="bus3", p_set=200)
+    return n
+
+
+@pytest.fixture(scope="function")
+def storage_network():
+    """
+    Single bus network with solar, gas, a store and a storage unit over four
+    days starting at sunrise.
+    """
+    n = pypsa.Network()
+    n.set_snapshots(pd.date_range("2013-01-01 06:00", periods=96, freq="h"))
+    n.add("Carrier", ["AC", "gas", "solar", "battery", "PHS"])
+    n.add("Bus", "bus0", carrier="AC")
+    hour = np.arange(96) % 24
+    n.add("Load", "load", bus="bus0", p_set=50 + 10 * np.cos(hour / 24 * 2 * np.pi))
+    n.add(
+        "Generator",
+        "solar",
+        bus="bus0",
+        carrier="solar",
+        p_nom=150,
+        p_max_pu=np.clip(np.sin(hour / 12 * np.pi), 0, 1)
+        * np.repeat([1.0, 1.0, 0.7, 1.0], 24),
+    )
+    n.add("Generator", "gas", bus="bus0", carrier="gas", p_nom=200, marginal_cost=50)
+    n.add("Store", "battery", bus="bus0", carrier="battery", e_nom=300)
+    n.add(
+        "StorageUnit",
+        "PHS",
+        bus="bus0",
+        carrier="PHS",
+        p_nom=20,
+        max_hours=6,
+        marginal_cost=0.1,
+    )
+    return n
+
+
 @pytest.fixture(scope="session")
 def config():
     path_config = pathlib.Path(pathlib.Path.cwd(), "config", "config.default.yaml")
@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: Contributors to PyPSA-Eur <https://github.com/pypsa/pypsa-eur>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests the functionalities of scripts/build_osm_network.py.
+"""
+
+import sys
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString, Point
+
+sys.path.append("./scripts")
+
+from scripts.build_osm_network import (
+    _split_linestring_by_point,
+    split_overpassing_lines,
+)
+
+
+def test_split_linestring_by_point_self_touching():
+    """
+    Verify a line passing twice through a point is cut at both passes.
+    """
+    linestring = LineString([(0, 0), (2, 0), (2, 1), (1, 1), (1, -1)])
+
+    segments = _split_linestring_by_point(linestring, [Point(1, 0)])
+
+    assert [list(s.coords) for s in segments] == [
+        [(0, 0), (1, 0)],
+        [(1, 0), (2, 0), (2, 1), (1, 1), (1, 0)],
+        [(1, 0), (1, -1)],
+    ]
+
+
+def test_split_overpassing_lines_many_segments():
+    """
+    Verify lines split into more than 26 segments get unique line ids.
+    """
+    lines = gpd.GeoDataFrame(
+        {"line_id": ["way/1"], "voltage": [380000]},
+        geometry=[LineString([(10.0, 50.0), (10.0, 50.3)])],
+        crs="EPSG:4326",
+    )
+    buses = gpd.GeoDataFrame(
+        geometry=[Point(10.0, 50.0 + 0.01 * i) for i in range(1, 30)],
+        crs="EPSG:4326",
+    )
+
+    split = split_overpassing_lines(lines, buses)
+
+    assert len(split) == 30
+    assert split["line_id"].is_unique
+    assert list(split["line_id"].iloc[[0, 25, 26, 29]]) == [
+        "way/1-a",
+        "way/1-z",
+        "way/1-aa",
+        "way/1-ad",
+    ]
+    assert split.length.sum() == pytest.approx(lines.length.sum())
@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: Contributors to PyPSA-Eur <https://github.com/pypsa/pypsa-eur>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests the functionalities of scripts/determine_availability_matrix.py.
+"""
+
+import sys
+
+import atlite
+import geopandas as gpd
+import numpy as np
+import rasterio
+import shapely
+import xarray as xr
+
+sys.path.append("./scripts")
+
+from scripts.determine_availability_matrix import tiled_availabilitymatrix
+
+
+def test_tiled_availabilitymatrix(tmp_path):
+    """
+    Verify tiling gives the same availability as whole regions, including
+    buffers around exclusions across tile seams.
+    """
+    cutout = atlite.Cutout(
+        tmp_path / "cutout.nc",
+        module="era5",
+        x=slice(9.5, 10.5),
+        y=slice(49.75, 50.25),
+        time="2013-01-01",
+    )
+    regions = gpd.GeoSeries(
+        [shapely.box(9.8, 49.9, 10.0, 50.1), shapely.box(10.0, 49.9, 10.2, 50.05)],
+        index=["DE0 0", "DE0 1"],
+        crs=4326,
+    ).to_crs(3035)
+
+    res = 100
+    xmin, ymin, xmax, ymax = np.floor(regions.total_bounds / res) * res
+    width, height = int((xmax - xmin) / res) + 1, int((ymax - ymin) / res) + 1
+    rng = np.random.default_rng(0)
+    codes = (rng.random((height, width)) < 0.002).astype(np.uint8)
+    fn = tmp_path / "exclusions.tif"
+    with rasterio.open(
+        fn,
+        "w",
+        driver="GTiff",
+        height=height,
+        width=width,
+        count=1,
+        dtype="uint8",
+        crs="EPSG:3035",
+        transform=rasterio.transform.from_origin(xmin, ymax + res, res, res),
+    ) as dst:
+        dst.write(codes, 1)
+
+    excluder = atlite.ExclusionContainer(crs=3035, res=res)
+    excluder.add_raster(str(fn), codes=[1], buffer=450, crs=3035)
+
+    availability = tiled_availabilitymatrix(cutout, regions, excluder, tile_size=2)
+    excluder = atlite.ExclusionContainer(crs=3035, res=res)
+    excluder.add_raster(str(fn), codes=[1], buffer=450, crs=3035)
+    expected = cutout.availabilitymatrix(regions.rename_axis("bus"), excluder)
+
+    assert 0 < float(expected.sum()) < float((expected > 0).sum())
+    xr.testing.assert_allclose(availability, expected.transpose("bus", "y", "x"))
@@ -0,0 +1,141 @@
+# SPDX-FileCopyrightText: Contributors to PyPSA-Eur <https://github.com/pypsa/pypsa-eur>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests the functionalities of scripts/ember_customization.py.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pypsa
+import pytest
+import xarray as xr
+
+sys.path.append("./scripts")
+
+from scripts.ember_customization import apply_hourly_fuel_prices
+
+
+def _gas_network(biogas):
+    n = pypsa.Network()
+    n.set_snapshots(pd.date_range("2013-01-01", periods=4, freq="h"))
+    n.add("Carrier", ["AC", "gas", "biogas"])
+    n.add("Bus", "DE0 0", carrier="AC")
+    n.add("Bus", "EU gas", carrier="gas")
+    n.add("Generator", "EU gas", bus="EU gas", carrier="gas", p_nom=1e4)
+    n.add(
+        "Link",
+        "DE0 0 OCGT",
+        bus0="EU gas",
+        bus1="DE0 0",
+        carrier="OCGT",
+        p_nom=1e3,
+        efficiency=0.5,
+        marginal_cost=2.0,
+    )
+    n.add("Load", "DE0 0", bus="DE0 0", p_set=100.0)
+    if biogas:
+        n.add("Bus", "EU biogas", carrier="biogas")
+        n.add(
+            "Generator",
+            "EU biogas",
+            bus="EU biogas",
+            carrier="biogas",
+            p_nom=30.0,
+            marginal_cost=5.0,
+        )
+        n.add(
+            "Link",
+            "EU biogas upgrading",
+            bus0="EU biogas",
+            bus1="EU gas",
+            carrier="biogas to gas",
+            p_nom=1e3,
+        )
+    return n
+
+
+@pytest.fixture
+def costs():
+    return pd.DataFrame({"VOM": [3.0, 4.5]}, index=["coal", "OCGT"])
+
+
+@pytest.fixture
+def hourly_gas_prices(tmp_path):
+    fn = tmp_path / "hourly_fuel_prices.nc"
+    prices = xr.DataArray(
+        np.array([[20.0, 10.0], [40.0, 12.0], [30.0, 14.0], [60.0, 16.0]]),
+        coords={
+            "snapshot": pd.date_range("2013-01-01", periods=4, freq="h"),
+            "carrier": ["gas", "coal"],
+        },
+        dims=["snapshot", "carrier"],
+        name="fuel_price",
+    )
+    prices.to_netcdf(fn)
+    return fn
+
+
+@pytest.mark.parametrize("biogas", [False, True])
+def test_apply_hourly_fuel_prices_modes(hourly_gas_prices, costs, biogas):
+    """
+    Verify both modes agree if the supply generator is the only injection
+    into the fuel bus and differ once biogas is fed into it.
+    """
+    objectives = {}
+    for mode in ["fuel_bus", "units"]:
+        n = _gas_network(biogas)
+        apply_hourly_fuel_prices(n, costs, ["gas"], hourly_gas_prices, mode=mode)
+        status, _ = n.optimize(solver_name="highs")
+        assert status == "ok"
+        objectives[mode] = n.objective
+
+    # 200 MWh gas per hour at the hourly price plus 2 EUR/MWh VOM
+    assert objectives["units"] == pytest.approx(200 * (150 + 4 * 2))
+    if biogas:
+        assert objectives["fuel_bus"] < objectives["units"]
+    else:
+        assert objectives["fuel_bus"] == pytest.approx(objectives["units"])
+
+
+def test_apply_hourly_fuel_prices_plants(hourly_gas_prices, costs):
+    """
+    Verify generators outside the fuel buses pay the hourly fuel price and
+    only the VOM of their static fuel-inclusive marginal cost.
+    """
+    n = _gas_network(biogas=False)
+    n.add(
+        "Generator",
+        "DE0 0 coal",
+        bus="DE0 0",
+        carrier="coal",
+        p_nom=1e3,
+        efficiency=0.4,
+        marginal_cost=3.0 + 8.0 / 0.4,
+    )
+
+    apply_hourly_fuel_prices(n, costs, ["gas", "coal"], hourly_gas_prices, "units")
+
+    np.testing.assert_allclose(
+        n.generators_t.marginal_cost["DE0 0 coal"],
+        np.array([10.0, 12.0, 14.0, 16.0]) / 0.4 + 3.0,
+    )
+
+
+def test_apply_hourly_fuel_prices_aggregated_snapshots(hourly_gas_prices, costs):
+    """
+    Verify prices are averaged over the hours represented by each snapshot
+    of a temporally aggregated network.
+    """
+    n = _gas_network(biogas=False)
+    n.set_snapshots(n.snapshots[::2])
+    n.snapshot_weightings.loc[:, :] = 2.0
+
+    apply_hourly_fuel_prices(n, costs, ["gas"], hourly_gas_prices, "fuel_bus")
+
+    np.testing.assert_allclose(
+        n.generators_t.marginal_cost["EU gas"], np.array([30.0, 45.0])
+    )
@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: Contributors to PyPSA-Eur <https://github.com/pypsa/pypsa-eur>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests the functionalities of scripts/_helpers.py.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("./scripts")
+
+from _helpers import generate_periodic_profiles, load_or_compute
+
+
+def test_generate_periodic_profiles():
+    """
+    Verify the weekly profile is mapped in the local time of each node.
+    """
+    dt_index = pd.date_range("2013-03-30", "2013-04-02", freq="h", tz="UTC")
+    nodes = ["DE0 0", "GB0 0", "XK0 0"]
+    weekly_profile = np.arange(24 * 7)
+
+    df = generate_periodic_profiles(dt_index, nodes, weekly_profile)
+
+    assert df.shape == (len(dt_index), len(nodes))
+    assert df.index.tz is None
+    # Saturday 2013-03-30 00:00 UTC is 01:00 CET and 00:00 GMT
+    assert df.iloc[0].tolist() == [24 * 5 + 1, 24 * 5, 24 * 5 + 1]
+    # Monday 2013-04-01 00:00 UTC is 02:00 CEST and 01:00 BST
+    monday = df.loc["2013-04-01 00:00"]
+    assert monday.tolist() == [2, 1, 2]
+
+
+def test_load_or_compute(tmp_path):
+    """
+    Verify results are computed once per key and read back from the cache.
+    """
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return pd.Series([1.0, 2.0])
+
+    kwargs = dict(
+        read=pd.read_pickle, write=lambda s, fn: s.to_pickle(fn), suffix=".pkl"
+    )
+    first = load_or_compute(compute, str(tmp_path), ["v1", b"data"], **kwargs)
+    second = load_or_compute(compute, str(tmp_path), ["v1", b"data"], **kwargs)
+    load_or_compute(compute, str(tmp_path), ["v1d", b"ata"], **kwargs)
+    load_or_compute(compute, None, ["v1", b"data"], **kwargs)
+
+    pd.testing.assert_series_equal(first, second)
+    assert len(calls) == 3
+    assert [p.suffix for p in tmp_path.iterdir()] == [".pkl", ".pkl"]
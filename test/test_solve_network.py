@@ -0,0 +1,124 @@
+# SPDX-FileCopyrightText: Contributors to PyPSA-Eur <https://github.com/pypsa/pypsa-eur>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests the functionalities of scripts/solve_network.py.
+"""
+
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append("./scripts")
+
+from scripts.solve_network import (
+    extra_functionality,
+    optimize_transmission_expansion_iteratively_warmstart,
+    optimize_with_model_cache,
+    optimize_with_parallel_rolling_horizon,
+)
+
+
+def test_optimize_transmission_expansion_iteratively_warmstart(meshed_network):
+    """
+    Verify the single-model iterative optimisation matches PyPSA's.
+    """
+    kwargs = dict(
+        min_iterations=2,
+        max_iterations=5,
+        line_unit_size=60,
+        link_unit_size={"DC": 50},
+        solver_name="highs",
+    )
+    reference = meshed_network.copy()
+    reference.optimize.optimize_transmission_expansion_iteratively(**kwargs)
+
+    n = meshed_network
+    status, _ = optimize_transmission_expansion_iteratively_warmstart(
+        n, track_iterations=True, **kwargs
+    )
+
+    assert status == "ok"
+    pd.testing.assert_series_equal(n.lines.s_nom_opt, reference.lines.s_nom_opt)
+    pd.testing.assert_series_equal(n.links.p_nom_opt, reference.links.p_nom_opt)
+    assert np.isclose(n.objective, reference.objective)
+    assert np.isclose(n.objective_constant, reference.objective_constant)
+    assert n.status_1 == "ok"
+    assert "s_nom_opt_1" in n.lines
+
+
+def test_optimize_with_model_cache(meshed_network, tmp_path, monkeypatch):
+    """
+    Verify a cached model gives the same solution and skips model building.
+    """
+    cache_dir = tmp_path / "models"
+    dependency = tmp_path / "bands.csv"
+    dependency.write_text("border,E_min,E_max\n")
+    calls = []
+
+    def solve(n):
+        return optimize_with_model_cache(
+            n,
+            str(cache_dir),
+            dependencies=[str(dependency)],
+            model_kwargs={"solver_dir": str(tmp_path)},
+            extra_functionality=lambda n, sns: calls.append(sns),
+            solver_name="highs",
+        )
+
+    miss = meshed_network.copy()
+    status, _ = solve(miss)
+    assert status == "ok"
+    assert len(calls) == 1
+    assert len(list(cache_dir.glob("model-*.nc"))) == 1
+
+    hit = meshed_network.copy()
+    status, _ = solve(hit)
+    assert status == "ok"
+    assert len(calls) == 1
+    assert hit.model.solver_dir == tmp_path
+    assert np.isclose(hit.objective, miss.objective)
+    pd.testing.assert_series_equal(hit.lines.s_nom_opt, miss.lines.s_nom_opt)
+
+    dependency.write_text("border,E_min,E_max\nAL-GR,0,1\n")
+    status, _ = solve(meshed_network.copy())
+    assert len(calls) == 2
+    assert len(list(cache_dir.glob("model-*.nc"))) == 2
+
+    monkeypatch.setattr("pypsa.__version__", "0.0.0")
+    status, _ = solve(meshed_network.copy())
+    assert len(calls) == 3
+    assert len(list(cache_dir.glob("model-*.nc"))) == 3
+
+
+def test_optimize_with_parallel_rolling_horizon(storage_network, config):
+    """
+    Verify the parallel rolling horizon solves with the repository's
+    extra_functionality and matches the sequential rolling horizon.
+    """
+    kwargs = dict(
+        horizon=24,
+        overlap=0,
+        extra_functionality=extra_functionality,
+        solver_name="highs",
+    )
+
+    sequential = storage_network.copy()
+    sequential.config = config
+    sequential.params = SimpleNamespace(custom_extra_functionality=None)
+    sequential.optimize.optimize_with_rolling_horizon(**kwargs)
+
+    n = storage_network.copy()
+    n.config = config
+    n.params = SimpleNamespace(custom_extra_functionality=None)
+    status, condition = optimize_with_parallel_rolling_horizon(
+        n, processes=2, presolve_resolution="3h", **kwargs
+    )
+
+    assert (status, condition) == ("ok", "optimal")
+    assert not n.generators_t.p.isna().any().any()
+    assert n.objective == pytest.approx(sequential.statistics.opex().sum(), rel=0.01)